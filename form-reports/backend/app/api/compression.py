@@ -0,0 +1,45 @@
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, IdentityResponder
+
+def _accepted_encodings(accept_encoding):
+    return {token.split(';')[0].strip().lower() for token in accept_encoding.split(',')}
+
+class BrotliResponder(IdentityResponder):
+    """Brotli counterpart of Starlette's GZipResponder; flushes after every streamed chunk"""
+    content_encoding = 'br'
+
+    def __init__(self, app, minimum_size, quality, exclude_content_types):
+        import brotli
+        super().__init__(app, minimum_size, exclude_content_types=exclude_content_types)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    async def apply_compression(self, body, *, more_body):
+        if more_body:
+            return self.compressor.process(body) + self.compressor.flush()
+        return self.compressor.process(body) + self.compressor.finish()
+
+class CompressionMiddleware(GZipMiddleware):
+    """Compress responses with brotli when the client accepts it, else gzip.
+
+    Streaming responses (e.g. NDJSON time entries) are flushed chunk by
+    chunk, so compression never holds back the first entries. Brotli is
+    optional: without the brotli package every client gets gzip.
+    """
+
+    def __init__(self, app, minimum_size=500, compresslevel=6, brotli_quality=5):
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self.brotli_quality = brotli_quality
+        try:
+            import brotli  # noqa: F401
+            self.brotli_available = True
+        except ImportError:
+            self.brotli_available = False
+
+    async def __call__(self, scope, receive, send):
+        if (scope['type'] == 'http' and self.brotli_available
+                and 'br' in _accepted_encodings(Headers(scope=scope).get('Accept-Encoding', ''))):
+            responder = BrotliResponder(self.app, self.minimum_size, self.brotli_quality, self.exclude_content_types)
+            await responder(scope, receive, send)
+            return
+        # gzip when accepted, otherwise uncompressed
+        await super().__call__(scope, receive, send)
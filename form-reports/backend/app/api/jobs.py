@@ -0,0 +1,92 @@
+import asyncio
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from connectwise_report.config.settings import REPORT_JOB_WORKERS, REPORT_JOB_HISTORY
+from connectwise_report.reports.artifacts import ArtifactStore, artifact_key, render_report_file
+
+class ReportJobs:
+    """Background report jobs rendered on a process pool.
+
+    Finished reports are stored by a hash of their input entries and format,
+    so a job for an unchanged week is answered from the artifact store
+    without rendering, and concurrent jobs for the same artifact share one
+    render.
+    """
+
+    def __init__(self, workers=REPORT_JOB_WORKERS, history=REPORT_JOB_HISTORY):
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.artifacts = ArtifactStore()
+        self.history = history
+        self.jobs = OrderedDict()
+        self._renders = {}
+        self._tasks = set()
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def submit(self, company_id, start_date, end_date, report_format, client, store):
+        """Queue a job and return its record; the work runs on the event loop and process pool"""
+        job = {
+            'id': uuid.uuid4().hex,
+            'company_id': company_id,
+            'start_date': start_date.strftime('%Y-%m-%d'),
+            'end_date': end_date.strftime('%Y-%m-%d'),
+            'format': report_format,
+            'status': 'queued',
+            'cached': False,
+            'error': None,
+            'file': None,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'finished': None,
+        }
+        self.jobs[job['id']] = job
+        while len(self.jobs) > self.history:
+            self.jobs.popitem(last=False)
+
+        task = asyncio.create_task(self._run(job, start_date, end_date, client, store))
+        # Keep a reference so the task is not garbage collected mid-run
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job, start_date, end_date, client, store):
+        job['status'] = 'running'
+        try:
+            entries = await client.get_time_entries_cached(
+                start_date, end_date, job['company_id'], store, profile='report'
+            )
+            if entries is None:
+                raise RuntimeError("Could not fetch time entries from ConnectWise")
+
+            job['file'], job['cached'] = await self.artifact(entries, job['format'], job['company_id'])
+            job['status'] = 'done'
+        except Exception as e:
+            job['status'] = 'failed'
+            job['error'] = str(e)
+        job['finished'] = datetime.now().isoformat(timespec='seconds')
+
+    async def artifact(self, entries, report_format, company_id):
+        """Return (path, cached) for the entries' report, rendering it only if it is not stored yet"""
+        key = await asyncio.to_thread(artifact_key, entries, report_format, company_id)
+        path = self.artifacts.get(key, report_format)
+        if path is not None:
+            return path, True
+        return await self._render(key, entries, report_format, company_id), False
+
+    async def _render(self, key, entries, report_format, company_id):
+        """Render an artifact once, however many jobs are waiting on it"""
+        future = self._renders.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(
+                self.executor, render_report_file,
+                entries, report_format, company_id, self.artifacts.path(key, report_format),
+            )
+            self._renders[key] = future
+            future.add_done_callback(lambda _: self._renders.pop(key, None))
+        return await asyncio.shield(future)
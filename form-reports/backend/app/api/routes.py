@@ -1,15 +1,296 @@
-from fastapi import APIRouter
-from datetime import datetime
-from typing import List
-from connectwise_report.utils.api import get_time_entries
-from connectwise_report.config.settings import IGNITE_COMPANY_ID
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from datetime import datetime, timedelta
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import List, Optional
+import asyncio
+import base64
+import hashlib
+import httpx
+import json
+import sys
+from connectwise_report.config.settings import IGNITE_COMPANY_ID, PREFETCH_ADJACENT_WEEKS
+from connectwise_report.reports.html_report import HTMLReport
+from connectwise_report.reports.artifacts import REPORT_FORMATS
+from connectwise_report.utils.dates import week_range
+from connectwise_report.utils.entry_store import window_bounds
+from connectwise_report.utils.resilience import CircuitOpenError
+from connectwise_report.utils.metrics import METRICS, request_timings
+from connectwise_report.utils.api import CIRCUIT_BREAKER
+from connectwise_report.utils.lookups import LOOKUP_CACHE
 
 router = APIRouter()
 
+def _build_cached_response(entries):
+    """Serialize entries once and derive the validators the browser revalidates with"""
+    body = json.dumps(entries).encode('utf-8')
+    return {
+        'body': body,
+        'etag': f'"{hashlib.sha1(body).hexdigest()}"',
+        # When this copy was built, not the newest entry's lastUpdated: deleting
+        # that entry would move the date backwards and earn a wrong 304
+        'last_modified': datetime.now().astimezone(),
+        # Newest first with a stable tie-break, for cursor pagination
+        'entries': sorted(entries, key=_cursor_key, reverse=True),
+    }
+
+def _cursor_key(entry):
+    return (entry['timeStart'], entry['id'])
+
+def _encode_cursor(entry):
+    return base64.urlsafe_b64encode(json.dumps(_cursor_key(entry)).encode('utf-8')).decode('ascii')
+
+def _decode_cursor(cursor):
+    try:
+        time_start, entry_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # Compared against (timeStart, id) keys, so anything else would fail later as a 500
+    if not isinstance(time_start, str) or not isinstance(entry_id, int) or isinstance(entry_id, bool):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return (time_start, entry_id)
+
+def _entries_page(entries, limit, cursor=None):
+    """One page of entries after cursor (keyset on timeStart, id) and the cursor for the next"""
+    start = 0
+    if cursor is not None:
+        after = _decode_cursor(cursor)
+        start = next((i for i, entry in enumerate(entries) if _cursor_key(entry) < after), len(entries))
+    page = entries[start:start + limit]
+    more = start + limit < len(entries)
+    return {'entries': page, 'nextCursor': _encode_cursor(page[-1]) if more else None}
+
+async def _ndjson_lines(pages):
+    """Encode batches of entries as NDJSON, one line per entry.
+
+    Headers are already sent when ConnectWise fails mid-stream, so the
+    failure is reported as a final {"error": ...} line.
+    """
+    try:
+        async for entries in pages:
+            if entries:
+                yield ''.join(json.dumps(entry) + '\n' for entry in entries)
+    except (httpx.HTTPError, CircuitOpenError) as e:
+        print(f"Error streaming time entries: {str(e)}", file=sys.stderr)
+        yield json.dumps({'error': "Could not fetch time entries"}) + '\n'
+
+def _not_modified(request, cached):
+    """Check the conditional request headers against a cached response"""
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        return cached['etag'] in [tag.strip() for tag in if_none_match.split(',')]
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since:
+        try:
+            return cached['last_modified'].replace(microsecond=0) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+async def _time_entries_response(app, start_date, end_date):
+    """The cached /time-entries response for a window, loaded once if missing"""
+    client = app.state.cw_client
+    store = app.state.entry_store
+
+    async def load():
+        entries = await client.get_time_entries_cached(start_date, end_date, IGNITE_COMPANY_ID, store)
+        return _build_cached_response(entries) if entries is not None else None
+
+    key = (IGNITE_COMPANY_ID,) + window_bounds(start_date, end_date)
+    return await app.state.response_cache.get_or_load(key, load)
+
+async def _warm(app, start_date, end_date):
+    # Runs in its own task; keep its stages out of the triggering request's Server-Timing
+    request_timings.set(None)
+    try:
+        await _time_entries_response(app, start_date, end_date)
+    except Exception as e:
+        print(f"Error prefetching time entries: {str(e)}", file=sys.stderr)
+
+def _prefetch_weeks(app, start_date, end_date, offsets):
+    """Load the window shifted by each offset (in weeks) in the background.
+
+    Weeks that start in the future are skipped. Windows already cached or
+    loading are cheap no-ops thanks to the response cache.
+    """
+    now = datetime.now(start_date.tzinfo)
+    scheduled = 0
+    for offset in offsets:
+        shift = timedelta(weeks=offset)
+        if start_date + shift > now:
+            continue
+        task = asyncio.create_task(_warm(app, start_date + shift, end_date + shift))
+        # Hold a reference until done so the task is not garbage collected
+        app.state.prefetch_tasks.add(task)
+        task.add_done_callback(app.state.prefetch_tasks.discard)
+        scheduled += 1
+    return scheduled
+
+def _adjacent_offsets():
+    return [offset for offset in range(-PREFETCH_ADJACENT_WEEKS, PREFETCH_ADJACENT_WEEKS + 1) if offset != 0]
+
 @router.get("/time-entries")
-async def get_time_entries_route(startDate: str, endDate: str):
+async def get_time_entries_route(request: Request, startDate: str, endDate: str, format: str = 'json',
+                                 limit: Optional[int] = None, cursor: Optional[str] = None, prefetch: bool = True):
+    """Time entries for a window as one JSON array, cursor-paginated pages, or streamed NDJSON.
+
+    format=ndjson (or Accept: application/x-ndjson) streams one entry per
+    line as ConnectWise pages arrive. limit (with cursor from the previous
+    page's nextCursor) returns {"entries": [...], "nextCursor": ...}.
+    prefetch=0 skips warming the adjacent weeks, for requests that are
+    themselves prefetches.
+    """
+    if format not in ('json', 'ndjson'):
+        raise HTTPException(status_code=400, detail="format must be one of: json, ndjson")
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be at least 1")
     start_date = datetime.fromisoformat(startDate.replace('Z', '+00:00'))
     end_date = datetime.fromisoformat(endDate.replace('Z', '+00:00'))
     
-    entries = get_time_entries(start_date, end_date, IGNITE_COMPANY_ID)
-    return entries 
\ No newline at end of file
+    # Stepping to the previous or next week is then served from the cache
+    if prefetch:
+        _prefetch_weeks(request.app, start_date, end_date, _adjacent_offsets())
+
+    if format == 'ndjson' or 'application/x-ndjson' in request.headers.get('accept', ''):
+        client = request.app.state.cw_client
+        store = request.app.state.entry_store
+        cached = request.app.state.response_cache.get((IGNITE_COMPANY_ID,) + window_bounds(start_date, end_date))
+
+        async def pages():
+            if cached is not None:
+                yield cached['entries']
+                return
+            async for entries in client.stream_time_entries_cached(start_date, end_date, IGNITE_COMPANY_ID, store):
+                yield entries
+
+        return StreamingResponse(_ndjson_lines(pages()), media_type='application/x-ndjson',
+                                 headers={'Cache-Control': 'private, no-cache'})
+
+    cached = await _time_entries_response(request.app, start_date, end_date)
+    if cached is None:
+        raise HTTPException(status_code=502, detail="Could not fetch time entries")
+
+    if limit is not None:
+        return _entries_page(cached['entries'], limit, cursor)
+
+    headers = {
+        'ETag': cached['etag'],
+        'Last-Modified': format_datetime(cached['last_modified'], usegmt=True),
+        'Cache-Control': 'private, no-cache',
+    }
+    if _not_modified(request, cached):
+        return Response(status_code=304, headers=headers)
+    return Response(cached['body'], media_type='application/json', headers=headers)
+
+@router.post("/prefetch", status_code=202)
+async def prefetch_route(request: Request, startDate: str, endDate: str):
+    """Warm a window and the weeks either side of it in the background"""
+    start_date = datetime.fromisoformat(startDate.replace('Z', '+00:00'))
+    end_date = datetime.fromisoformat(endDate.replace('Z', '+00:00'))
+    return {'scheduled': _prefetch_weeks(request.app, start_date, end_date, [0] + _adjacent_offsets())}
+
+@router.get("/debug-report")
+async def get_debug_report_route(request: Request, startDate: str, endDate: str):
+    """Stream the HTML debug report ticket by ticket"""
+    start_date = datetime.fromisoformat(startDate.replace('Z', '+00:00'))
+    end_date = datetime.fromisoformat(endDate.replace('Z', '+00:00'))
+
+    client = request.app.state.cw_client
+    entries = await client.get_time_entries_cached(
+        start_date, end_date, IGNITE_COMPANY_ID, request.app.state.entry_store, profile='report'
+    )
+    if entries is None:
+        return Response("Could not fetch time entries", status_code=502)
+    # Group the entries off the event loop; StreamingResponse already runs
+    # the sync iter_html generator in a worker thread
+    report = HTMLReport()
+    tickets_data = await asyncio.to_thread(report._process_entries, entries)
+    return StreamingResponse(report.iter_html(tickets_data, IGNITE_COMPANY_ID), media_type='text/html')
+
+@router.get("/summary")
+async def get_summary_route(request: Request, startDate: str, endDate: str, companyId: int = IGNITE_COMPANY_ID):
+    """Hours rolled up per ticket, engineer, work type, day and project, split billable/non-billable"""
+    start_date = datetime.fromisoformat(startDate.replace('Z', '+00:00'))
+    end_date = datetime.fromisoformat(endDate.replace('Z', '+00:00'))
+
+    client = request.app.state.cw_client
+    store = request.app.state.entry_store
+
+    async def load():
+        from connectwise_report.reports.analytics import entries_frame, summarize
+        entries = await client.get_time_entries_cached(start_date, end_date, companyId, store, profile='report')
+        if entries is None:
+            return None
+        # Normalizing and aggregating a long range is CPU work; keep it off the event loop
+        return await asyncio.to_thread(lambda: summarize(entries_frame(entries)))
+
+    key = ('summary', companyId) + window_bounds(start_date, end_date)
+    summary = await request.app.state.response_cache.get_or_load(key, load)
+    if summary is None:
+        raise HTTPException(status_code=502, detail="Could not fetch time entries")
+    return summary
+
+@router.post("/reports", status_code=202)
+async def submit_report_route(request: Request, weekStart: str, format: str = 'docx',
+                              companyId: int = IGNITE_COMPANY_ID):
+    """Queue a report for the Monday-Friday week containing weekStart"""
+    if format not in REPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(REPORT_FORMATS)}")
+    week_start = datetime.fromisoformat(weekStart.replace('Z', '+00:00'))
+    # Any day of the week stands for that week's Monday
+    start_date, end_date = week_range(week_start - timedelta(days=week_start.weekday()))
+    job = request.app.state.report_jobs.submit(
+        companyId, start_date, end_date, format, request.app.state.cw_client, request.app.state.entry_store
+    )
+    return _job_status(job)
+
+@router.get("/reports/{job_id}")
+async def get_report_status_route(request: Request, job_id: str):
+    return _job_status(_get_job(request, job_id))
+
+@router.get("/reports/{job_id}/download")
+async def download_report_route(request: Request, job_id: str):
+    job = _get_job(request, job_id)
+    if job['status'] != 'done':
+        raise HTTPException(status_code=409, detail=f"Report is {job['status']}")
+    prefix = 'activity_report' if job['format'] == 'docx' else 'debug_report'
+    filename = f"{prefix}_{job['company_id']}_{job['start_date']}{REPORT_FORMATS[job['format']]}"
+    return FileResponse(job['file'], filename=filename)
+
+def _get_job(request, job_id):
+    job = request.app.state.report_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown report job")
+    return job
+
+def _job_status(job):
+    """Public view of a job record (the artifact path stays server-side)"""
+    status = {key: value for key, value in job.items() if key != 'file'}
+    status['download'] = f"/reports/{job['id']}/download" if job['status'] == 'done' else None
+    return status
+
+@router.get("/scheduler")
+async def get_scheduler_route(request: Request):
+    """When the off-peak pre-render runs next and how its last run went"""
+    scheduler = getattr(request.app.state, 'scheduler', None)
+    if scheduler is None:
+        return {'enabled': False, 'next_run': None, 'last_run': None}
+    return dict(scheduler.status(), enabled=True)
+
+@router.get("/cache/stats")
+async def get_cache_stats_route(request: Request):
+    return request.app.state.response_cache.stats()
+
+@router.get("/metrics")
+async def get_metrics_route(request: Request):
+    """Prometheus text exposition of this process's metrics"""
+    cache = request.app.state.response_cache.stats()
+    gauges = [
+        ('response_cache_hits', {}, cache['hits']),
+        ('response_cache_misses', {}, cache['misses']),
+        ('response_cache_coalesced', {}, cache['coalesced']),
+        ('response_cache_size', {}, cache['size']),
+        ('lookup_cache_size', {}, LOOKUP_CACHE.stats()['size']),
+        ('cw_circuit_open', {}, int(CIRCUIT_BREAKER.state != 'closed')),
+    ]
+    return PlainTextResponse(METRICS.render(gauges), media_type='text/plain; version=0.0.4')
@@ -0,0 +1,43 @@
+import time
+from starlette.datastructures import MutableHeaders
+from connectwise_report.config.settings import SERVER_TIMING_ENABLED
+from connectwise_report.utils.metrics import METRICS, request_timings, server_timing_header
+
+class TimingMiddleware:
+    """Time every API request by route and optionally report stage timings.
+
+    With server_timing on, stage timers that run while handling a request
+    (page fetches, normalization, ...) are collected and sent back in a
+    Server-Timing header. For streamed responses only the stages finished
+    before the headers go out are included.
+    """
+
+    def __init__(self, app, server_timing=SERVER_TIMING_ENABLED):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not METRICS.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        timings = []
+        token = request_timings.set(timings) if self.server_timing else None
+
+        async def send_with_timing(message):
+            if message['type'] == 'http.response.start' and self.server_timing:
+                elapsed = time.perf_counter() - started
+                headers = MutableHeaders(raw=message['headers'])
+                headers.append('Server-Timing', server_timing_header(timings + [('total', elapsed)]))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            if token is not None:
+                request_timings.reset(token)
+            # Label by route template, not raw path, to keep cardinality bounded
+            route = scope.get('route')
+            METRICS.observe('http_request_seconds', time.perf_counter() - started,
+                            route=getattr(route, 'path', 'unmatched'), method=scope['method'])
@@ -0,0 +1,119 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import argparse
+import os
+import sys
+import time
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from connectwise_report.config.settings import OUTPUT_DIR, BATCH_FETCH_WORKERS, BATCH_RENDER_WORKERS
+from connectwise_report.utils.api import get_time_entries_cached, get_active_company_ids
+from connectwise_report.utils.entry_store import EntryStore
+from connectwise_report.utils.dates import last_week_range
+
+def render_company_reports(company_id, raw_entries, output_dir):
+    """Render the HTML/PDF and DOCX reports for one company (runs in a worker process)"""
+    from connectwise_report.models.time_entry import normalize_entries
+    from connectwise_report.reports.fragments import open_fragment_cache
+    from connectwise_report.reports.html_report import HTMLReport
+    from connectwise_report.reports.word_report import WordReport
+
+    started = time.perf_counter()
+    time_entries = normalize_entries(raw_entries)
+    fragment_cache = open_fragment_cache()
+    try:
+        HTMLReport(fragment_cache=fragment_cache).generate(time_entries, output_dir, company_id)
+        report_file = WordReport(fragment_cache=fragment_cache).generate(time_entries, output_dir, company_id)
+    finally:
+        if fragment_cache is not None:
+            fragment_cache.close()
+    return report_file, time.perf_counter() - started
+
+def generate_batch(company_ids=None, start_date=None, end_date=None, output_dir=OUTPUT_DIR,
+                   fetch_workers=BATCH_FETCH_WORKERS, render_workers=BATCH_RENDER_WORKERS):
+    """Generate the weekly report for many companies.
+
+    Fetches run on a thread pool and each company's entries are handed to a
+    process pool for rendering as soon as they arrive, so I/O and CPU work
+    overlap. With no company_ids, every company with time in the window is
+    included. One company failing never stops the rest; each result records
+    its own timings and error.
+    """
+    if start_date is None or end_date is None:
+        start_date, end_date = last_week_range()
+    os.makedirs(output_dir, exist_ok=True)
+
+    if company_ids is None:
+        company_ids = get_active_company_ids(start_date, end_date)
+        if company_ids is None:
+            raise RuntimeError("Could not list companies with time entries")
+
+    store = EntryStore()
+    results = {company_id: {'company_id': company_id, 'status': 'pending', 'entries': 0,
+                            'fetch_seconds': None, 'render_seconds': None, 'file': None, 'error': None}
+               for company_id in company_ids}
+
+    def fetch(company_id):
+        started = time.perf_counter()
+        entries = get_time_entries_cached(start_date, end_date, company_id, store, profile='report')
+        return entries, time.perf_counter() - started
+
+    try:
+        with ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool, \
+                ProcessPoolExecutor(max_workers=render_workers) as render_pool:
+            fetches = {fetch_pool.submit(fetch, company_id): company_id for company_id in company_ids}
+            renders = {}
+            for future in as_completed(fetches):
+                company_id = fetches[future]
+                result = results[company_id]
+                try:
+                    entries, result['fetch_seconds'] = future.result()
+                except Exception as e:
+                    result['status'], result['error'] = 'failed', f"fetch: {str(e)}"
+                    continue
+                if entries is None:
+                    result['status'], result['error'] = 'failed', "fetch: ConnectWise request failed"
+                    continue
+                result['entries'] = len(entries)
+                if not entries:
+                    result['status'] = 'empty'
+                    continue
+                renders[render_pool.submit(render_company_reports, company_id, entries, output_dir)] = company_id
+
+            for future in as_completed(renders):
+                result = results[renders[future]]
+                try:
+                    result['file'], result['render_seconds'] = future.result()
+                    result['status'] = 'ok'
+                except Exception as e:
+                    result['status'], result['error'] = 'failed', f"render: {str(e)}"
+    finally:
+        store.close()
+    return [results[company_id] for company_id in company_ids]
+
+def print_summary(results):
+    """Print per-company timings and failures"""
+    print(f"\n{'Company':>10} {'Status':>8} {'Entries':>8} {'Fetch s':>8} {'Render s':>9}  Detail")
+    for result in results:
+        fetch = f"{result['fetch_seconds']:.2f}" if result['fetch_seconds'] is not None else '-'
+        render = f"{result['render_seconds']:.2f}" if result['render_seconds'] is not None else '-'
+        detail = result['error'] or result['file'] or ''
+        print(f"{result['company_id']:>10} {result['status']:>8} {result['entries']:>8} {fetch:>8} {render:>9}  {detail}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate last week's report for many companies")
+    parser.add_argument('company_ids', nargs='*', type=int,
+                        help="Company IDs (default: every company with time last week)")
+    parser.add_argument('--fetch-workers', type=int, default=BATCH_FETCH_WORKERS)
+    parser.add_argument('--render-workers', type=int, default=BATCH_RENDER_WORKERS)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    results = generate_batch(args.company_ids or None, fetch_workers=args.fetch_workers,
+                             render_workers=args.render_workers)
+    print_summary(results)
+    failed = [result for result in results if result['status'] == 'failed']
+    print(f"\n{len(results)} companies in {time.perf_counter() - started:.1f}s, {len(failed)} failed")
+    if failed:
+        exit(1)
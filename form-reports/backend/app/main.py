@@ -1,4 +1,5 @@
-from datetime import datetime, timedelta
+from datetime import datetime
+import argparse
 import os
 import sys
 
@@ -6,55 +7,156 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from connectwise_report.config.settings import IGNITE_COMPANY_ID, OUTPUT_DIR
-from connectwise_report.utils.api import get_time_entries
-from connectwise_report.reports.html_report import HTMLReport
-from connectwise_report.reports.word_report import WordReport
+from connectwise_report.utils.api import get_time_entries_cached, iter_time_entries_chunked
+from connectwise_report.utils.entry_store import EntryStore
+from connectwise_report.utils.dates import PERIODS, last_period_range, last_week_range
+from connectwise_report.models.time_entry import normalize_entries
+from connectwise_report.reports.fragments import open_fragment_cache
+from connectwise_report.utils.metrics import METRICS
+from connectwise_report.utils.snapshots import SNAPSHOT_KINDS, export_snapshot, load_snapshot, snapshot_path
 
-def generate_customer_report(output_format='docx'):
-    """Generate the main customer report"""
+OUTPUT_FORMATS = ('all', 'docx', 'html')
+REPORT_TITLES = {'month': "Monthly Activity Report", 'quarter': "Quarterly Activity Report",
+                 'year': "Annual Activity Report"}
+
+def generate_customer_report(output_format='all', snapshot=False):
+    """Generate the main customer report ('docx'), the debug report ('html', plus PDF) or both ('all').
+
+    With snapshot, the raw and normalized entries are also saved next to
+    the reports for debugging and offline replay (see replay_snapshot).
+    """
     # Create output directory
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     
-    # Calculate date range
+    # Calculate date range (last week's Monday to Friday)
     current_date = datetime.now()
-    # Get last week's Monday
-    days_since_monday = current_date.weekday()
-    start_date = current_date - timedelta(days=days_since_monday + 7)  # Go back an additional week
-    # Set time to start of day (midnight)
-    start_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
-    end_date = start_date + timedelta(days=4)  # Go to Friday of that week
-    end_date = end_date.replace(hour=23, minute=59, second=59)
+    start_date, end_date = last_week_range(current_date)
     
     print(f"\nScript running on: {current_date.strftime('%A, %B %d, %Y')}")
     print(f"\nGenerating report for period:")
     print(f"Start Date: {start_date.strftime('%A, %B %d, %Y')}")
     print(f"End Date: {end_date.strftime('%A, %B %d, %Y')}")
     
+    entry_store = EntryStore()
     try:
         # Get time entries
-        time_entries = get_time_entries(start_date, end_date, IGNITE_COMPANY_ID)
+        # The 'report' profile projects only the fields the renderers use and
+        # has ConnectWise drop 'Meetings' tickets server-side
+        time_entries = get_time_entries_cached(start_date, end_date, IGNITE_COMPANY_ID, entry_store, profile='report')
+        if time_entries is None:
+            # A failed fetch must not look like a quiet week
+            raise RuntimeError("Could not fetch time entries from ConnectWise")
         if not time_entries:
             print("No time entries found for this period!")
             return
-            
-        # Filter out meetings
-        time_entries = [entry for entry in time_entries if 'Meetings' not in entry.get('ticket_summary', '')]
         
-        # Generate debug report
-        html_report = HTMLReport()
-        html_report.generate(time_entries, OUTPUT_DIR, IGNITE_COMPANY_ID)
-        
-        # Generate main report
-        word_report = WordReport()
-        return word_report.generate(time_entries, OUTPUT_DIR, IGNITE_COMPANY_ID)
+        if snapshot:
+            save_snapshots(time_entries, IGNITE_COMPANY_ID, start_date, end_date)
+        return render_reports(time_entries, output_format, IGNITE_COMPANY_ID)
         
     except Exception as e:
         print(f"Error generating report: {str(e)}")
         raise
+    finally:
+        entry_store.close()
+
+def render_reports(time_entries, output_format, company_id):
+    """Render raw or normalized entries into the requested reports; returns the DOCX file, if any"""
+    # Parse and clean entries once for both renderers
+    time_entries = normalize_entries(time_entries)
+    # Tickets and entries unchanged since the last run are not re-rendered
+    fragment_cache = open_fragment_cache()
+    try:
+        # Renderers are imported only when wanted; each pulls in its own
+        # heavy dependencies (pandas for the HTML totals, python-docx)
+        if output_format in ('all', 'html'):
+            # Generate debug report
+            from connectwise_report.reports.html_report import HTMLReport
+            html_report = HTMLReport(fragment_cache=fragment_cache)
+            html_report.generate(time_entries, OUTPUT_DIR, company_id)
+
+        if output_format in ('all', 'docx'):
+            # Generate main report
+            from connectwise_report.reports.word_report import WordReport
+            word_report = WordReport(fragment_cache=fragment_cache)
+            return word_report.generate(time_entries, OUTPUT_DIR, company_id)
+    finally:
+        if fragment_cache is not None:
+            fragment_cache.close()
+
+def save_snapshots(time_entries, company_id, start_date, end_date):
+    """Save the raw and normalized entries of a run in SNAPSHOT_FORMAT"""
+    for kind in SNAPSHOT_KINDS:
+        path = export_snapshot(time_entries, snapshot_path(OUTPUT_DIR, kind, company_id), kind,
+                               company_id=company_id, start_date=start_date.isoformat(),
+                               end_date=end_date.isoformat())
+        print(f"Saved {kind} entries snapshot to: {path}")
+
+def replay_snapshot(path, output_format='all'):
+    """Render the reports from a saved snapshot instead of ConnectWise"""
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    time_entries, metadata = load_snapshot(path)
+    print(f"\nReplaying {metadata['count']} {metadata['kind']} entries from {path} "
+          f"(company {metadata.get('company_id')}, saved {metadata['created']})")
+    return render_reports(time_entries, output_format, metadata.get('company_id', IGNITE_COMPANY_ID))
+
+def generate_long_range_report(period, output_format='all', volumes=False):
+    """Generate the reports for last month, quarter or year.
+
+    Entries are fetched in date-window chunks and streamed through the
+    renderers, so memory does not grow with the range. With volumes, the
+    DOCX and HTML/PDF reports are split into one file per month. Returns
+    the DOCX files written.
+    """
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    start_date, end_date = last_period_range(period)
+    print(f"\nGenerating {period} report for {start_date.strftime('%B %d, %Y')} "
+          f"to {end_date.strftime('%B %d, %Y')} (exclusive)")
+
+    # Lazy import, like the renderers in generate_customer_report
+    from connectwise_report.reports.long_range import render_chunks
+    formats = ('html', 'docx') if output_format == 'all' else (output_format,)
+    entry_store = EntryStore()
+    chunks = iter_time_entries_chunked(start_date, end_date, IGNITE_COMPANY_ID, entry_store, profile='report')
+    fragment_cache = open_fragment_cache()
+    try:
+        return render_chunks(chunks, OUTPUT_DIR, IGNITE_COMPANY_ID, formats, volumes,
+                             title=REPORT_TITLES[period], fragment_cache=fragment_cache)
+    finally:
+        if fragment_cache is not None:
+            fragment_cache.close()
+        entry_store.close()
+
+def print_timings():
+    """Print where the run spent its time, per pipeline stage"""
+    totals = METRICS.stage_totals()
+    if totals:
+        print("\nTimings:")
+        for stage, (calls, seconds) in sorted(totals.items(), key=lambda item: -item[1][1]):
+            print(f"  {stage:<14} {seconds:8.3f}s  ({calls} call{'s' if calls != 1 else ''})")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate last week's report")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='all',
+                        help="docx activity report, html/pdf debug report, or both (default)")
+    parser.add_argument('--period', choices=('week',) + PERIODS, default='week',
+                        help="Report on last week (default), month, quarter or year")
+    parser.add_argument('--volumes', action='store_true',
+                        help="Split month/quarter/year reports into one file per month")
+    parser.add_argument('--snapshot', action='store_true',
+                        help="Also save the week's raw and normalized entries for debugging and replay")
+    parser.add_argument('--replay', metavar='SNAPSHOT',
+                        help="Render the reports from a saved snapshot without calling ConnectWise")
+    args = parser.parse_args()
+
     try:
-        report_file = generate_customer_report()
+        if args.replay:
+            report_file = replay_snapshot(args.replay, args.format)
+        elif args.period == 'week':
+            report_file = generate_customer_report(args.format, args.snapshot)
+        else:
+            report_file = generate_long_range_report(args.period, args.format, args.volumes)
+        print_timings()
         print(f"\nScript completed successfully!")
     except Exception as e:
         print(f"\nScript failed: {str(e)}")
@@ -0,0 +1,163 @@
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from connectwise_report.config.settings import (
+    SCHEDULER_RUN_AT, SCHEDULER_COMPANY_IDS, SCHEDULER_FORMATS, SCHEDULER_CONCURRENCY, REPORT_JOB_WORKERS
+)
+from connectwise_report.utils.dates import last_week_range
+from connectwise_report.utils.metrics import METRICS
+
+class ReportScheduler:
+    """Pre-render last week's reports every day at an off-peak time.
+
+    Each run warms the entry store for every configured company and renders
+    its reports into the report jobs' artifact store, so Monday-morning
+    POST /reports requests find finished artifacts instead of all fetching
+    and rendering at once. Runs later in the week are cheap: entries
+    refresh incrementally and unchanged reports are not rendered again.
+    Runs inside the API process (see app/server.py) or standalone.
+    """
+
+    def __init__(self, client, store, report_jobs, company_ids=SCHEDULER_COMPANY_IDS, run_at=SCHEDULER_RUN_AT,
+                 formats=SCHEDULER_FORMATS, concurrency=SCHEDULER_CONCURRENCY):
+        self.client = client
+        self.store = store
+        self.report_jobs = report_jobs
+        self.company_ids = company_ids
+        self.run_at = datetime.strptime(run_at, '%H:%M').time()
+        self.formats = formats
+        self.concurrency = concurrency
+        self.next_run_at = None
+        self.last_run = None
+
+    def next_run(self, now=None):
+        """The first run_at time after now"""
+        now = now or datetime.now()
+        run = datetime.combine(now.date(), self.run_at)
+        return run if run > now else run + timedelta(days=1)
+
+    def status(self):
+        return {
+            'next_run': self.next_run_at.isoformat(timespec='seconds') if self.next_run_at else None,
+            'last_run': self.last_run,
+        }
+
+    async def run_forever(self):
+        while True:
+            self.next_run_at = self.next_run()
+            await asyncio.sleep(max(0.0, (self.next_run_at - datetime.now()).total_seconds()))
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"Scheduled report run failed: {str(e)}", file=sys.stderr)
+
+    async def run_once(self, now=None):
+        """Warm and pre-render last week's reports for every company; returns one result per company"""
+        started = datetime.now()
+        start_date, end_date = last_week_range(now)
+        company_ids = self.company_ids
+        if company_ids is None:
+            company_ids = await self.client.get_active_company_ids(start_date, end_date)
+            if company_ids is None:
+                raise RuntimeError("Could not list companies with time entries")
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run_company(company_id):
+            async with semaphore:
+                return await self._run_company(company_id, start_date, end_date)
+
+        results = await asyncio.gather(*(run_company(company_id) for company_id in company_ids))
+        self.last_run = {
+            'started': started.isoformat(timespec='seconds'),
+            'finished': datetime.now().isoformat(timespec='seconds'),
+            'start_date': start_date.strftime('%Y-%m-%d'),
+            'end_date': end_date.strftime('%Y-%m-%d'),
+            'results': results,
+        }
+        return results
+
+    async def _run_company(self, company_id, start_date, end_date):
+        """Fetch one company's week and make sure every format is in the artifact store"""
+        result = {'company_id': company_id, 'status': 'pending', 'entries': 0, 'rendered': [], 'cached': [],
+                  'failed': [], 'seconds': None, 'error': None}
+        started = time.perf_counter()
+        entries = await self.client.get_time_entries_cached(
+            start_date, end_date, company_id, self.store, profile='report'
+        )
+        if entries is None:
+            result['status'], result['error'] = 'failed', "fetch: ConnectWise request failed"
+            METRICS.count('scheduler_reports_total', result='failed')
+        else:
+            result['entries'] = len(entries)
+            # One format failing (e.g. no PDF backend installed) leaves the others in place
+            artifacts = await asyncio.gather(
+                *(self.report_jobs.artifact(entries, report_format, company_id) for report_format in self.formats),
+                return_exceptions=True,
+            )
+            errors = []
+            for report_format, artifact in zip(self.formats, artifacts):
+                if isinstance(artifact, Exception):
+                    outcome = 'failed'
+                    errors.append(f"{report_format}: {str(artifact)}")
+                else:
+                    outcome = 'cached' if artifact[1] else 'rendered'
+                result[outcome].append(report_format)
+                METRICS.count('scheduler_reports_total', format=report_format, result=outcome)
+            result['status'] = 'failed' if errors else 'ok'
+            result['error'] = '; '.join(errors) or None
+        result['seconds'] = round(time.perf_counter() - started, 3)
+        return result
+
+def print_summary(results):
+    """Print per-company outcomes"""
+    print(f"\n{'Company':>10} {'Status':>8} {'Entries':>8} {'Seconds':>8}  Detail")
+    for result in results:
+        detail = f"rendered: {', '.join(result['rendered']) or '-'}; cached: {', '.join(result['cached']) or '-'}"
+        if result['error']:
+            detail += f"; {result['error'].splitlines()[0]}"
+        print(f"{result['company_id']:>10} {result['status']:>8} {result['entries']:>8} {result['seconds']:>8.2f}  {detail}")
+
+async def run_standalone(company_ids, once, concurrency, render_workers):
+    """Run the scheduler outside the API with its own client, entry store and render pool"""
+    from app.api.jobs import ReportJobs
+    from connectwise_report.utils.async_api import AsyncConnectWiseClient
+    from connectwise_report.utils.entry_store import EntryStore
+
+    client = AsyncConnectWiseClient()
+    store = EntryStore()
+    report_jobs = ReportJobs(workers=render_workers)
+    scheduler = ReportScheduler(client, store, report_jobs, company_ids=company_ids, concurrency=concurrency)
+    try:
+        if once:
+            return await scheduler.run_once()
+        print(f"Pre-rendering last week's reports daily at {scheduler.run_at.strftime('%H:%M')}")
+        await scheduler.run_forever()
+    finally:
+        report_jobs.close()
+        await client.aclose()
+        store.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-render last week's reports during off-peak hours")
+    parser.add_argument('company_ids', nargs='*', type=int,
+                        help="Company IDs (default: SCHEDULER_COMPANY_IDS)")
+    parser.add_argument('--all-companies', action='store_true', help="Every company with time last week")
+    parser.add_argument('--once', action='store_true', help="Run now and exit instead of waiting for the schedule")
+    parser.add_argument('--concurrency', type=int, default=SCHEDULER_CONCURRENCY)
+    parser.add_argument('--render-workers', type=int, default=REPORT_JOB_WORKERS)
+    args = parser.parse_args()
+
+    company_ids = None if args.all_companies else (args.company_ids or SCHEDULER_COMPANY_IDS)
+    results = asyncio.run(run_standalone(company_ids, args.once, args.concurrency, args.render_workers))
+    if results is not None:
+        print_summary(results)
+        if any(result['status'] == 'failed' for result in results):
+            exit(1)
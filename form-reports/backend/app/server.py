@@ -0,0 +1,53 @@
+from contextlib import asynccontextmanager
+import asyncio
+import os
+import sys
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from app.api.routes import router
+from app.api.compression import CompressionMiddleware
+from app.api.timing import TimingMiddleware
+from app.api.jobs import ReportJobs
+from app.scheduler import ReportScheduler
+from connectwise_report.config.settings import SCHEDULER_ENABLED
+from connectwise_report.utils.async_api import AsyncConnectWiseClient
+from connectwise_report.utils.cache import TTLCache
+from connectwise_report.utils.entry_store import EntryStore
+
+@asynccontextmanager
+async def lifespan(app):
+    """Share one pooled ConnectWise client, entry store, response cache, job pool and prefetch tasks across all requests"""
+    app.state.cw_client = AsyncConnectWiseClient()
+    app.state.entry_store = EntryStore()
+    app.state.response_cache = TTLCache()
+    app.state.report_jobs = ReportJobs()
+    app.state.prefetch_tasks = set()
+    # Pre-render last week's reports off-peak; run app/scheduler.py standalone instead when
+    # the API runs several worker processes
+    app.state.scheduler = None
+    scheduler_task = None
+    if SCHEDULER_ENABLED:
+        app.state.scheduler = ReportScheduler(app.state.cw_client, app.state.entry_store, app.state.report_jobs)
+        scheduler_task = asyncio.create_task(app.state.scheduler.run_forever())
+    try:
+        yield
+    finally:
+        if scheduler_task is not None:
+            scheduler_task.cancel()
+        for task in list(app.state.prefetch_tasks):
+            task.cancel()
+        app.state.report_jobs.close()
+        await app.state.cw_client.aclose()
+        app.state.entry_store.close()
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(TimingMiddleware)
+app.include_router(router)
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=5000)
@@ -0,0 +1,36 @@
+"""Compare WordReport table rendering: python-docx per cell vs cloned template.
+
+Usage: python benchmarks/bench_docx.py [entry counts...]
+"""
+import os
+import sys
+import time
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_raw_entries
+from connectwise_report.models.time_entry import normalize_entries
+from connectwise_report.reports.word_report import WordReport
+
+def render(entries, fast_tables):
+    """Render entry tables only (no save) and return (seconds, document XML)"""
+    report = WordReport(fast_tables=fast_tables)
+    started = time.perf_counter()
+    for entry in entries:
+        report.create_entry_table(entry)
+    elapsed = time.perf_counter() - started
+    return elapsed, report.document.element.xml
+
+def main(counts):
+    print(f"{'entries':>8} {'python-docx/s':>14} {'template/s':>11} {'speedup':>8}")
+    for count in counts:
+        entries = normalize_entries(make_raw_entries(count))
+        slow, slow_xml = render(entries, fast_tables=False)
+        fast, fast_xml = render(entries, fast_tables=True)
+        if slow_xml != fast_xml:
+            raise SystemExit(f"Output mismatch at {count} entries")
+        print(f"{count:>8} {count / slow:>14.0f} {count / fast:>11.0f} {slow / fast:>7.1f}x")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [50, 200, 1000])
@@ -0,0 +1,67 @@
+"""Cold import time of the CLI and API entry points, and which heavy libraries they load.
+
+Each import runs in a fresh interpreter. A module that loads a library on
+its FORBIDDEN list counts as a regression: those should only be imported
+when the backend that needs them is used.
+
+Usage: python benchmarks/bench_imports.py [runs]   (exits 1 on a regression)
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ('pandas', 'docx', 'httpx', 'requests', 'fastapi', 'pdfkit', 'weasyprint', 'reportlab')
+
+# Module -> heavy libraries it must not load at import time
+FORBIDDEN = {
+    'app.main': ('pandas', 'docx', 'httpx', 'requests', 'fastapi', 'pyarrow'),
+    'app.batch': ('pandas', 'docx', 'httpx', 'requests', 'fastapi'),
+    'app.server': ('pandas', 'docx', 'requests'),
+    'connectwise_report.models.time_entry': ('pandas', 'docx', 'httpx', 'requests'),
+    'connectwise_report.reports.html_report': ('pandas', 'docx', 'httpx', 'requests', 'pdfkit', 'weasyprint', 'reportlab'),
+    'connectwise_report.reports.word_report': ('pandas', 'httpx', 'requests'),
+    'connectwise_report.utils.api': ('pandas', 'docx', 'httpx', 'requests'),
+}
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{'seconds': elapsed, 'loaded': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+def time_import(module, runs=5):
+    """Median cold import time of module over runs fresh interpreters, plus the heavy libraries it loaded"""
+    timings = []
+    loaded = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+            env=dict(os.environ, PYTHONPATH=BACKEND_DIR),
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        timings.append(result['seconds'])
+        loaded = result['loaded']
+    forbidden = [name for name in loaded if name in FORBIDDEN.get(module, ())]
+    return {'seconds': statistics.median(timings), 'loaded': loaded, 'forbidden': forbidden}
+
+def run(runs=5, modules=FORBIDDEN):
+    return {module: time_import(module, runs) for module in modules}
+
+def print_results(results):
+    print(f"{'module':<42} {'import ms':>9}  heavy libraries loaded")
+    for module, result in results.items():
+        flag = f"  <-- should not load {', '.join(result['forbidden'])}" if result['forbidden'] else ''
+        print(f"{module:<42} {result['seconds'] * 1000:>9.0f}  {', '.join(result['loaded']) or '-'}{flag}")
+
+if __name__ == "__main__":
+    results = run(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
+    print_results(results)
+    if any(result['forbidden'] for result in results.values()):
+        exit(1)
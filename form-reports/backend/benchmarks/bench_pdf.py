@@ -0,0 +1,64 @@
+"""Compare PDF backends on the sample entries in reports/.
+
+Renders a batch of debug reports (one per simulated company) with each
+backend and prints wall time. Backends whose dependencies are missing
+are reported as unavailable.
+
+Usage: python benchmarks/bench_pdf.py [batch size] [entry multiplier]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.samples import sample_files, load_debug_csv
+from connectwise_report.models.time_entry import normalize_entries
+from connectwise_report.reports.html_report import HTMLReport
+from connectwise_report.reports.pdf_backends import PDF_BACKENDS, get_pdf_backend
+
+def run_batch(backend, entries, batch_size, workdir):
+    """Render batch_size reports concurrently; returns seconds taken"""
+    report = HTMLReport(pdf_backend=backend)
+    tickets_data = report._process_entries(entries)
+
+    def render_one(company_id):
+        html_file = os.path.join(workdir, f"{backend.name}_{company_id}.html")
+        with open(html_file, 'w', encoding='utf-8') as f:
+            for chunk in report.iter_html(tickets_data, company_id):
+                f.write(chunk)
+        backend.render(html_file, html_file[:-5] + '.pdf', tickets_data=tickets_data, company_id=company_id)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(render_one, range(batch_size)))
+    return time.perf_counter() - started
+
+def main(batch_size=8, multiplier=1):
+    raw = []
+    for path in sample_files():
+        raw.extend(load_debug_csv(path))
+    entries = normalize_entries(raw * multiplier)
+    print(f"{len(entries)} entries per report, batch of {batch_size} reports")
+
+    workdir = tempfile.mkdtemp(prefix='bench_pdf_')
+    try:
+        for name in PDF_BACKENDS:
+            backend = get_pdf_backend(name)
+            try:
+                elapsed = run_batch(backend, entries, batch_size, workdir)
+            except (ImportError, OSError) as e:
+                print(f"{name:>18}: unavailable ({str(e).splitlines()[0]})")
+                continue
+            finally:
+                backend.close()
+            print(f"{name:>18}: {elapsed:7.2f}s total, {elapsed / batch_size * 1000:7.1f} ms/report")
+    finally:
+        shutil.rmtree(workdir)
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
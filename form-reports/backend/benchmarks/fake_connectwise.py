@@ -0,0 +1,110 @@
+"""A local stand-in for the ConnectWise time entries API.
+
+Serves synthetic entries (see synthetic.py) over HTTP with ConnectWise's
+paging (page/pageSize, a Link rel="last" header and /count), the timeStart
+and lastUpdated conditions the client sends, and optional per-request
+latency, so fetch and API benchmarks run without a real ConnectWise.
+"""
+import json
+import re
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, urlencode
+
+CONDITION_PATTERN = re.compile(r'(timeStart>=|timeStart<|lastUpdated>)\[([^\]]+)\]')
+
+def _matches(entry, conditions):
+    for field, value in CONDITION_PATTERN.findall(conditions or ''):
+        if field == 'timeStart>=' and not entry['timeStart'] >= value:
+            return False
+        if field == 'timeStart<' and not entry['timeStart'] < value:
+            return False
+        if field == 'lastUpdated>' and not entry['_info']['lastUpdated'] > value:
+            return False
+    return True
+
+class FakeConnectWise:
+    """Threaded HTTP server answering /time/entries and /time/entries/count.
+
+    latency is added to every response (seconds); max_page_size caps
+    pageSize like ConnectWise does. Use as a context manager, and point
+    clients at .url in place of CW_URL.
+    """
+
+    def __init__(self, entries, latency=0.0, max_page_size=1000):
+        # Newest first, like the client's orderBy
+        self.entries = sorted(entries, key=lambda entry: entry['timeStart'], reverse=True)
+        self.latency = latency
+        self.max_page_size = max_page_size
+        self.requests = 0
+        self._selected = {}
+        self._server = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}/"
+
+    def _select(self, query):
+        # Every page of a query filters the same way, so filter once
+        conditions = query.get('conditions', [''])[0]
+        if conditions not in self._selected:
+            self._selected[conditions] = [entry for entry in self.entries if _matches(entry, conditions)]
+        return self._selected[conditions]
+
+    def handle(self, path, query):
+        """Return (status, headers, body) for one request"""
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if path.endswith('/time/entries/count'):
+            return 200, {}, {'count': len(self._select(query))}
+        if not path.endswith('/time/entries'):
+            return 404, {}, {'message': 'Not found'}
+
+        selected = self._select(query)
+        page = int(query.get('page', ['1'])[0])
+        page_size = min(int(query.get('pageSize', ['25'])[0]), self.max_page_size)
+        last_page = max(1, -(-len(selected) // page_size))
+        link_query = {key: values[0] for key, values in query.items()}
+        link_query['page'] = last_page
+        headers = {'Link': f'<{self.url.rstrip("/")}{path}?{urlencode(link_query)}>; rel="last"'}
+        return 200, headers, selected[(page - 1) * page_size:page * page_size]
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                status, headers, body = fake.handle(url.path, parse_qs(url.query))
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,286 @@
+"""Reproducible benchmark suite against a local ConnectWise stand-in.
+
+For each entry count, synthetic entries are served by FakeConnectWise and
+the suite measures:
+- the sync ConnectWise fetch
+- normalization
+- HTMLReport.generate and WordReport.generate, uncached and with every
+  fragment already cached
+- /time-entries served by uvicorn: cold and warm latency, concurrent
+  throughput, and time to the first NDJSON line
+
+It also records the cold import times from bench_imports. Results are
+written as JSON so runs can be compared across commits.
+
+Usage:
+  python benchmarks/run.py [--counts 10 100 ...] [--page-size N] [--latency S] [--output FILE]
+  python benchmarks/run.py --compare OLD.json NEW.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import bench_imports
+from benchmarks.fake_connectwise import FakeConnectWise
+from benchmarks.synthetic import make_raw_entries
+from connectwise_report.utils import api
+from connectwise_report.utils.api import build_time_entries_params, fetch_all_pages
+from connectwise_report.models.time_entry import normalize_entries
+from connectwise_report.reports.pdf_backends import PDFBackend, get_pdf_backend
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, 'results')
+DEFAULT_COUNTS = [10, 100, 1000, 10000, 50000]
+COMPANY_ID = 21137
+
+class NoPDFBackend(PDFBackend):
+    """Skips PDF conversion so HTMLReport.generate times only the HTML"""
+    name = 'none'
+
+    def render(self, html_file, pdf_file, tickets_data=None, company_id=None):
+        pass
+
+def entry_window(raw_entries):
+    """Whole-day start/end dates covering every entry"""
+    starts = sorted(entry['timeStart'] for entry in raw_entries)
+    start = datetime.fromisoformat(starts[0][:10])
+    end = datetime.fromisoformat(starts[-1][:10]) + timedelta(days=1)
+    return start, end
+
+def timed(func, *args, **kwargs):
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - started, result
+
+def bench_fetch(fake, start, end, page_size):
+    url = f"{fake.url}time/entries"
+    params = build_time_entries_params(start, end, COMPANY_ID)
+    requests_before = fake.requests
+    seconds, entries = timed(fetch_all_pages, url, {}, params, page_size=page_size)
+    return {'fetch_s': seconds, 'fetch_requests': fake.requests - requests_before,
+            'fetch_entries_per_s': len(entries) / seconds}
+
+def bench_render(raw_entries, workdir, pdf_backend):
+    from connectwise_report.reports.fragments import FragmentCache
+    from connectwise_report.reports.html_report import HTMLReport
+    from connectwise_report.reports.word_report import WordReport
+
+    normalize_s, entries = timed(normalize_entries, raw_entries)
+    html_s, _ = timed(HTMLReport(pdf_backend=pdf_backend).generate, entries, workdir, COMPANY_ID)
+    docx_s, _ = timed(WordReport().generate, entries, workdir, COMPANY_ID)
+
+    # Regenerating with every ticket and entry already in the fragment cache,
+    # like a refresh run where nothing changed
+    fragments = FragmentCache(os.path.join(workdir, f'fragments_{len(raw_entries)}.sqlite3'))
+    HTMLReport(pdf_backend=pdf_backend, fragment_cache=fragments).generate(entries, workdir, COMPANY_ID)
+    WordReport(fragment_cache=fragments).generate(entries, workdir, COMPANY_ID)
+    html_cached_s, _ = timed(HTMLReport(pdf_backend=pdf_backend, fragment_cache=fragments).generate,
+                             entries, workdir, COMPANY_ID)
+    docx_cached_s, _ = timed(WordReport(fragment_cache=fragments).generate, entries, workdir, COMPANY_ID)
+    fragments.close()
+    return {'normalize_s': normalize_s, 'html_s': html_s, 'docx_s': docx_s,
+            'html_cached_s': html_cached_s, 'docx_cached_s': docx_cached_s}
+
+class ApiServer:
+    """The FastAPI app under uvicorn in a background thread, wired to the fake ConnectWise"""
+
+    def __init__(self, fake, store_path, page_size):
+        import uvicorn
+        from app.api import routes
+        from app.server import app
+        from connectwise_report.utils.async_api import AsyncConnectWiseClient
+        from connectwise_report.utils.cache import TTLCache
+        from connectwise_report.utils.entry_store import EntryStore
+
+        # Neighbouring windows would overlap the benchmark window
+        routes.PREFETCH_ADJACENT_WEEKS = 0
+        app.state.cw_client = AsyncConnectWiseClient(base_url=fake.url, headers={}, page_size=page_size)
+        app.state.entry_store = EntryStore(store_path)
+        app.state.response_cache = TTLCache()
+        app.state.prefetch_tasks = set()
+        self.app = app
+        self.server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=0, lifespan='off', log_level='warning'))
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        port = self.server.servers[0].sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join()
+        self.app.state.entry_store.close()
+
+    def reset(self):
+        """Forget cached responses and synced windows so the next request is cold"""
+        self.app.state.response_cache.invalidate()
+        store = self.app.state.entry_store
+        with store._lock:
+            store._conn.execute("DELETE FROM entries")
+            store._conn.execute("DELETE FROM synced_windows")
+            store._conn.commit()
+
+async def _api_requests(base_url, params, warm_requests, concurrency):
+    import httpx
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+        async def get(extra=None):
+            started = time.perf_counter()
+            response = await client.get('/time-entries', params=dict(params, **(extra or {})))
+            response.raise_for_status()
+            return time.perf_counter() - started, len(response.content)
+
+        cold_s, body_bytes = await get()
+        warm = [(await get())[0] for _ in range(warm_requests)]
+        started = time.perf_counter()
+        await asyncio.gather(*(get() for _ in range(concurrency)))
+        concurrent_s = time.perf_counter() - started
+        return cold_s, body_bytes, warm, concurrent_s
+
+async def _ndjson_first_entry(base_url, params):
+    import httpx
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+        started = time.perf_counter()
+        first = None
+        async with client.stream('GET', '/time-entries', params=dict(params, format='ndjson')) as response:
+            async for line in response.aiter_lines():
+                if first is None and line:
+                    first = time.perf_counter() - started
+        return first, time.perf_counter() - started
+
+def bench_api(server, start, end, warm_requests=20, concurrency=20):
+    params = {'startDate': start.isoformat() + 'Z', 'endDate': end.isoformat() + 'Z'}
+    server.reset()
+    cold_s, body_bytes, warm, concurrent_s = asyncio.run(
+        _api_requests(server.url, params, warm_requests, concurrency)
+    )
+    server.reset()
+    ndjson_first_s, ndjson_total_s = asyncio.run(_ndjson_first_entry(server.url, params))
+    warm_ms = sorted(seconds * 1000 for seconds in warm)
+    return {
+        'api_body_bytes': body_bytes,
+        'api_cold_s': cold_s,
+        'api_warm_p50_ms': statistics.median(warm_ms),
+        'api_warm_p95_ms': warm_ms[min(len(warm_ms) - 1, int(len(warm_ms) * 0.95))],
+        'api_requests_per_s': concurrency / concurrent_s,
+        'ndjson_cold_first_entry_s': ndjson_first_s,
+        'ndjson_cold_total_s': ndjson_total_s,
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCHMARKS_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(counts, page_size, latency, pdf_backend_name=None, rate_limit=False, import_runs=3):
+    if not rate_limit:
+        # Measure our code, not the client-side ConnectWise rate limit
+        api.RATE_LIMITER.rate = api.RATE_LIMITER.capacity = 1e9
+    pdf_backend = get_pdf_backend(pdf_backend_name) if pdf_backend_name else NoPDFBackend()
+
+    results = []
+    workdir = tempfile.mkdtemp(prefix='cw-bench-')
+    try:
+        for count in counts:
+            raw_entries = make_raw_entries(count, COMPANY_ID)
+            start, end = entry_window(raw_entries)
+            print(f"{count} entries...", file=sys.stderr)
+            with FakeConnectWise(raw_entries, latency=latency, max_page_size=page_size) as fake:
+                result = {'entries': count}
+                result.update(bench_fetch(fake, start, end, page_size))
+                result.update(bench_render(raw_entries, workdir, pdf_backend))
+                with ApiServer(fake, os.path.join(workdir, f'store_{count}.sqlite3'), page_size) as server:
+                    result.update(bench_api(server, start, end))
+            results.append(result)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'commit': git_commit(),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {'page_size': page_size, 'latency': latency, 'pdf_backend': pdf_backend.name,
+                   'rate_limit': rate_limit},
+        'imports': bench_imports.run(import_runs),
+        'results': results,
+    }
+
+def print_results(report):
+    columns = [('entries', 'entries', '{:.0f}'), ('fetch_s', 'fetch s', '{:.3f}'),
+               ('normalize_s', 'norm s', '{:.3f}'), ('html_s', 'html s', '{:.3f}'), ('docx_s', 'docx s', '{:.3f}'),
+               ('docx_cached_s', 'docx warm s', '{:.3f}'),
+               ('api_cold_s', 'api cold s', '{:.3f}'), ('api_warm_p50_ms', 'warm p50 ms', '{:.1f}'),
+               ('api_requests_per_s', 'api req/s', '{:.0f}'), ('ndjson_cold_first_entry_s', 'ndjson 1st s', '{:.3f}')]
+    print(' '.join(f"{title:>12}" for _, title, _ in columns))
+    for result in report['results']:
+        print(' '.join(f"{fmt.format(result[key]):>12}" for key, _, fmt in columns))
+    print()
+    bench_imports.print_results(report['imports'])
+
+def compare(old_file, new_file):
+    """Print new/old ratios for every metric the two runs share"""
+    with open(old_file) as f:
+        old = json.load(f)
+    with open(new_file) as f:
+        new = json.load(f)
+    print(f"{old['commit']} -> {new['commit']}  (ratio < 1 is faster, except throughput metrics)")
+    old_results = {result['entries']: result for result in old['results']}
+    for result in new['results']:
+        before = old_results.get(result['entries'])
+        if before is None:
+            continue
+        print(f"\n{result['entries']} entries")
+        for key, value in result.items():
+            if key != 'entries' and before.get(key):
+                print(f"  {key:<28} {before[key]:>12.4f} {value:>12.4f} {value / before[key]:>7.2f}x")
+    print("\nimports")
+    for module, result in new['imports'].items():
+        before = old['imports'].get(module)
+        if before:
+            print(f"  {module:<42} {before['seconds'] * 1000:>7.0f}ms {result['seconds'] * 1000:>7.0f}ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--counts', nargs='+', type=int, default=DEFAULT_COUNTS)
+    parser.add_argument('--page-size', type=int, default=1000, help="ConnectWise page size (max 1000)")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every fake ConnectWise response")
+    parser.add_argument('--pdf-backend', help="Also convert the HTML report with this PDF backend")
+    parser.add_argument('--rate-limit', action='store_true', help="Keep the client-side ConnectWise rate limit")
+    parser.add_argument('--output', help="Results file (default: benchmarks/results/<commit>-<timestamp>.json)")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help="Compare two results files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        exit(0)
+
+    report = run(args.counts, args.page_size, args.latency, args.pdf_backend, args.rate_limit)
+    print_results(report)
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{report['commit'] or 'unknown'}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to: {output}")
@@ -0,0 +1,28 @@
+import ast
+import csv
+import glob
+import os
+
+REPORTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'reports')
+
+def sample_files(pattern='debug_raw_entries_*.csv'):
+    """Paths of the raw entry dumps checked in under reports/"""
+    return sorted(glob.glob(os.path.join(REPORTS_DIR, pattern)))
+
+def load_debug_csv(path):
+    """Load a debug_raw_entries CSV, turning the stringified dicts back into objects"""
+    entries = []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            entry = {}
+            for key, value in row.items():
+                if value == '':
+                    continue
+                if value[:1] in '{[' or key in ('id', 'actualHours', 'hoursDeduct', 'hoursBilled'):
+                    try:
+                        value = ast.literal_eval(value)
+                    except (ValueError, SyntaxError):
+                        pass
+                entry[key] = value
+            entries.append(entry)
+    return entries
@@ -0,0 +1,52 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+ENGINEERS = ["Campbell Jennings", "Aroha Ngata", "Liam Chen", "Priya Patel", "Sam Taylor"]
+WORK_TYPES = ["Remote Work", "Onsite", "Travel", "Project Work"]
+SUMMARIES = [
+    "CW 650748 Form Weekly Onsite Support (week 9th December 2024) [DONT ADD TIME speak with Chris)",
+    "Printer offline in reception",
+    "New starter laptop setup",
+    "Weekly Meetings",
+    "SharePoint permissions for finance team",
+    "Documentation update - network diagram",
+    "VPN drops every afternoon",
+]
+NOTES = [
+    "Checked print queue and restarted spooler\nConfirmed with user",
+    "Updated permissions, see https://it360nz.sharepoint.com/sites/clients/Shared%20Documents/Forms/AllItems.aspx?sourcedoc=%7B1234%7D&file=Client_Network_Diagram.docx&action=default (done)\nEmailed client",
+    "# Imaged laptop\n# Installed Office\n# Joined to Intune",
+    "Long pasted log: " + "x" * 400 + " https://example.com/" + "a" * 80,
+    "",
+]
+
+def make_raw_entries(count, company_id=21137, start=None, seed=1):
+    """Build raw ConnectWise-shaped time entries like the reports/debug_raw_entries_*.csv samples"""
+    rng = random.Random(seed)
+    start = start or datetime(2024, 12, 9, 19, 0, tzinfo=timezone.utc)
+    tickets = [(680000 + i, rng.choice(SUMMARIES)) for i in range(max(1, count // 4))]
+    entries = []
+    for i in range(count):
+        ticket_id, summary = rng.choice(tickets)
+        time_start = start + timedelta(minutes=37 * i)
+        hours = rng.choice([0.25, 0.5, 1.0, 1.5, 2.0])
+        engineer = rng.choice(ENGINEERS)
+        entries.append({
+            'id': 670000 + i,
+            'company': {'id': company_id, 'identifier': 'IGN', 'name': 'Ignite'},
+            'chargeToId': ticket_id,
+            'chargeToType': 'ServiceTicket',
+            'member': {'id': 200 + ENGINEERS.index(engineer), 'identifier': engineer.split()[0], 'name': engineer},
+            'workType': {'id': 3, 'name': rng.choice(WORK_TYPES)},
+            'timeStart': time_start.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'timeEnd': (time_start + timedelta(hours=hours)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'actualHours': hours,
+            'billableOption': rng.choice(['Billable', 'Billable', 'DoNotBill', 'NoCharge']),
+            'notes': rng.choice(NOTES),
+            'ticket': {'id': ticket_id, 'summary': summary},
+            'project': {'id': 77, 'name': 'Form Weekly Onsite Support - 2024'} if i % 5 == 0 else None,
+            'ticketBoard': 'Service Desk',
+            'ticketStatus': 'In Progress',
+            '_info': {'lastUpdated': (time_start + timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%SZ')},
+        })
+    return entries
@@ -8,8 +8,88 @@ CW_HEADERS = {
     "Accept": "application/vnd.connectwise.com+json; version=2019.1"
 }
 
+# ConnectWise fetch settings
+CW_PAGE_SIZE = 1000  # ConnectWise caps pageSize at 1000
+CW_MAX_WORKERS = 4  # Concurrent page fetches once the total is known
+CW_POOL_SIZE = 10  # Keep-alive connections held by the shared session
+CW_TIMEOUT = 30  # Seconds
+
+# ConnectWise rate limiting, retries and circuit breaker (utils/resilience.py)
+CW_RATE_LIMIT = 10  # Requests per second per process, shared by every worker
+CW_RATE_BURST = 20  # Requests allowed back to back before the rate applies
+CW_MAX_RETRIES = 4  # Retries for a GET on 429/502/503/504 or a connection failure
+CW_BACKOFF_BASE = 0.5  # Seconds; doubles each retry, with full jitter, and honours Retry-After
+CW_BACKOFF_MAX = 30  # Seconds
+CW_BREAKER_FAILURES = 5  # Consecutive failures that open the circuit
+CW_BREAKER_RESET = 30  # Seconds before a trial request is let through an open circuit
+
+# Query profiles: fields= projection and server-side exclusions per consumer.
+# 'full' returns raw API entries; 'report' carries only what the renderers use.
+QUERY_PROFILES = {
+    'full': {},
+    'report': {
+        'fields': [
+            'id', 'company/id', 'timeStart', 'timeEnd', 'actualHours', 'billableOption', 'notes',
+            'member/id', 'member/name', 'workType/name', 'ticket/id', 'ticket/summary', 'project/id', 'project/name',
+            'ticketBoard', 'ticketStatus', '_info/lastUpdated',
+        ],
+        'exclude_summary_words': ['Meetings'],
+        'enrich': True,  # Fill in missing boards, statuses and names with bulk lookups (utils/lookups.py)
+    },
+}
+
+# Local time entry store
+ENTRY_STORE_PATH = 'cache/time_entries.sqlite3'
+ENTRY_STORE_STABLE_DAYS = 14  # Windows older than this are served without refreshing
+
+# In-memory /time-entries response cache
+RESPONSE_CACHE_TTL = 60  # Seconds
+RESPONSE_CACHE_MAXSIZE = 256  # Cached (company, window) responses
+PREFETCH_ADJACENT_WEEKS = 1  # Weeks either side of a requested week warmed in the background (0 disables)
+
+# Ticket, project and member lookups shared across requests and reports (utils/lookups.py)
+LOOKUP_CACHE_TTL = 900  # Seconds; board and status changes show up within this
+LOOKUP_CACHE_MAXSIZE = 20000  # Cached tickets, projects and members
+LOOKUP_BATCH_SIZE = 100  # IDs per conditions=id in (...) query, keeping request URLs short
+
+# Rendered report fragments (reports/fragments.py): unchanged tickets and entries are not re-rendered
+FRAGMENT_CACHE_ENABLED = True
+FRAGMENT_CACHE_PATH = 'cache/fragments.sqlite3'
+FRAGMENT_CACHE_MAX_AGE_DAYS = 30  # Fragments unused for this long are pruned
+
+# Instrumentation (utils/metrics.py): stage timers, counters and GET /metrics
+METRICS_ENABLED = True
+SERVER_TIMING_ENABLED = False  # Add a Server-Timing header with stage timings to API responses
+
+# Debug snapshots of raw and normalized entries (utils/snapshots.py)
+SNAPSHOT_FORMAT = 'ndjson'  # 'ndjson' (gzip, no extra dependencies), 'arrow' or 'parquet' (need pyarrow)
+
 # Company settings
 IGNITE_COMPANY_ID = 21137
 
 # Report settings
-OUTPUT_DIR = 'reports' 
\ No newline at end of file
+OUTPUT_DIR = 'reports'
+
+# Long-range reports (month, quarter, year), fetched in date-window chunks
+LONG_RANGE_CHUNK_DAYS = 7  # Days per fetched window; windows never cross a month boundary
+LONG_RANGE_FETCH_WORKERS = 2  # Windows fetched at once, each with up to CW_MAX_WORKERS page fetches
+
+# Multi-company batch runs (app/batch.py)
+BATCH_FETCH_WORKERS = 8  # Companies fetched concurrently
+BATCH_RENDER_WORKERS = 4  # Processes rendering reports
+
+# On-demand report jobs (POST /reports)
+ARTIFACT_DIR = 'cache/artifacts'  # Rendered reports, named by a hash of their inputs
+REPORT_JOB_WORKERS = 2  # Processes rendering report jobs
+REPORT_JOB_HISTORY = 500  # Finished jobs kept for polling
+
+# Off-peak pre-rendering of last week's reports into the artifact store (app/scheduler.py)
+SCHEDULER_ENABLED = True  # Run inside the API process; app/scheduler.py also runs standalone
+SCHEDULER_RUN_AT = '03:00'  # Daily, server local time; Monday's run renders the week that just ended
+SCHEDULER_COMPANY_IDS = [IGNITE_COMPANY_ID]  # None pre-renders every company with time last week
+SCHEDULER_FORMATS = ('docx', 'html', 'pdf')
+SCHEDULER_CONCURRENCY = 4  # Companies fetched and rendered at once
+
+# PDF backend for the debug report: 'wkhtmltopdf', 'weasyprint' or 'reportlab'
+# (batches render fastest with the in-process weasyprint or reportlab)
+PDF_BACKEND = 'wkhtmltopdf'
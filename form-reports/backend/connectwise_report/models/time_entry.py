@@ -0,0 +1,73 @@
+from datetime import datetime
+import pytz
+from connectwise_report.utils.formatting import clean_ticket_summary, format_detail, format_bullet_detail
+from connectwise_report.utils.metrics import METRICS
+
+# Resolved once; pytz.timezone() per entry was a measurable cost on big reports
+NZ_TZ = pytz.timezone('Pacific/Auckland')
+
+def parse_cw_datetime(value):
+    """Parse a ConnectWise UTC timestamp and convert it to NZ time"""
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).astimezone(NZ_TZ)
+
+class TimeEntry:
+    """A time entry normalized once from the raw API dict.
+
+    Times are already in NZ time, summaries and notes are pre-cleaned for
+    both renderers, so HTMLReport and WordReport do no parsing of their own.
+    """
+
+    __slots__ = (
+        'id', 'time_start', 'start', 'end', 'hours', 'billable_option',
+        'ticket_id', 'ticket_summary', 'site_name', 'board', 'status',
+        'engineer', 'work_type', 'project_name', 'notes', 'html_notes', 'word_detail',
+    )
+
+    def __init__(self, raw):
+        ticket = raw.get('ticket') or {}
+        if not isinstance(ticket, dict):
+            ticket = {}
+        project = raw.get('project')
+
+        self.id = raw.get('id')
+        self.time_start = raw['timeStart']
+        self.start = parse_cw_datetime(raw['timeStart'])
+        self.end = parse_cw_datetime(raw['timeEnd'])
+        self.hours = raw.get('actualHours', 0)
+        self.billable_option = raw.get('billableOption')
+        self.ticket_id = str(ticket.get('id', ''))
+        self.ticket_summary = ticket.get('summary', '')
+        self.site_name = clean_ticket_summary(ticket.get('summary', 'N/A'))
+        self.board = raw.get('ticketBoard', 'Unknown Board')
+        self.status = raw.get('ticketStatus', 'Unknown Status')
+        self.engineer = (raw.get('member') or {}).get('name')
+        self.work_type = (raw.get('workType') or {}).get('name')
+        self.project_name = project.get('name', '') if isinstance(project, dict) else ''
+        self.notes = raw.get('notes', '')
+        self.html_notes = format_detail(self.notes, project)
+        self.word_detail = format_bullet_detail(self.notes)
+
+    def to_fields(self):
+        """Every normalized field as a plain dict, e.g. for a snapshot"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_fields(cls, fields):
+        """Rebuild a TimeEntry from to_fields() output without re-normalizing the raw entry"""
+        entry = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(entry, name, fields.get(name))
+        for name in ('start', 'end'):
+            value = getattr(entry, name)
+            if isinstance(value, str):
+                value = datetime.fromisoformat(value)
+            setattr(entry, name, value.astimezone(NZ_TZ))
+        return entry
+
+    def __repr__(self):
+        return f"TimeEntry(id={self.id!r}, ticket_id={self.ticket_id!r}, time_start={self.time_start!r})"
+
+def normalize_entries(entries):
+    """Normalize raw API entries into TimeEntry objects; already-normalized ones pass through"""
+    with METRICS.timer('normalize'):
+        return [entry if isinstance(entry, TimeEntry) else TimeEntry(entry) for entry in entries]
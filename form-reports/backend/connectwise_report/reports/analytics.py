@@ -0,0 +1,64 @@
+import pandas as pd
+from connectwise_report.models.time_entry import normalize_entries
+from connectwise_report.utils.metrics import METRICS
+
+# billableOption value that counts towards billable hours; DoNotBill,
+# NoCharge and NoDefault are all non-billable
+BILLABLE_OPTION = 'Billable'
+
+# Rollup name -> frame column it groups by
+ROLLUPS = {
+    'ticket': 'ticket_id',
+    'engineer': 'engineer',
+    'work_type': 'work_type',
+    'day': 'date',
+    'project': 'project_name',
+}
+
+def entries_frame(time_entries):
+    """Load time entries into a DataFrame once, one row per entry"""
+    entries = normalize_entries(time_entries)
+    frame = pd.DataFrame({
+        'id': [entry.id for entry in entries],
+        'ticket_id': [entry.ticket_id for entry in entries],
+        'ticket_summary': [entry.ticket_summary for entry in entries],
+        'engineer': [entry.engineer or 'N/A' for entry in entries],
+        'work_type': [entry.work_type or 'N/A' for entry in entries],
+        'project_name': [entry.project_name or 'N/A' for entry in entries],
+        'date': [entry.start.strftime('%Y-%m-%d') for entry in entries],
+        'hours': pd.Series([entry.hours or 0 for entry in entries], dtype='float64'),
+        'billable_option': [entry.billable_option for entry in entries],
+    })
+    frame['billable'] = frame['billable_option'] == BILLABLE_OPTION
+    frame['billable_hours'] = frame['hours'].where(frame['billable'], 0.0)
+    return frame
+
+def rollup(frame, by):
+    """Total, billable and non-billable hours and entry counts per value of column by"""
+    grouped = frame.groupby(by, sort=True).agg(
+        hours=('hours', 'sum'),
+        billable_hours=('billable_hours', 'sum'),
+        entries=('hours', 'size'),
+    )
+    grouped['non_billable_hours'] = grouped['hours'] - grouped['billable_hours']
+    return grouped
+
+def ticket_hours(frame):
+    """Total hours per ticket ID, for the renderers' per-ticket totals"""
+    return frame.groupby('ticket_id', sort=False)['hours'].sum().to_dict()
+
+def summarize(frame, rollups=ROLLUPS):
+    """JSON-ready totals plus one list of rows per rollup"""
+    with METRICS.timer('summarize'):
+        hours = frame['hours'].sum()
+        billable_hours = frame['billable_hours'].sum()
+        summary = {
+            'entries': len(frame),
+            'hours': round(float(hours), 2),
+            'billable_hours': round(float(billable_hours), 2),
+            'non_billable_hours': round(float(hours - billable_hours), 2),
+        }
+        for name, column in rollups.items():
+            rows = rollup(frame, column).round(2).reset_index()
+            summary[name] = rows.rename(columns={column: 'key'}).to_dict(orient='records')
+        return summary
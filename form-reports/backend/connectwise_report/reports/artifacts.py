@@ -0,0 +1,66 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from connectwise_report.config.settings import ARTIFACT_DIR
+from connectwise_report.reports.pdf_backends import get_pdf_backend
+
+REPORT_FORMATS = {'docx': '.docx', 'html': '.html', 'pdf': '.pdf'}
+
+def artifact_key(raw_entries, report_format, company_id):
+    """Content address for a rendered report: a hash of its inputs, format and (for PDFs) backend"""
+    digest = hashlib.sha256()
+    # PDFs from different backends look different, so switching PDF_BACKEND must not serve old ones
+    renderer = get_pdf_backend().name if report_format == 'pdf' else ''
+    digest.update(f"{report_format}:{renderer}:{company_id}:".encode('utf-8'))
+    # Hash by ID, so the same entries read back in a different order share an artifact
+    entries = sorted(raw_entries, key=lambda entry: entry['id'])
+    digest.update(json.dumps(entries, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+    return digest.hexdigest()
+
+def render_report_file(raw_entries, report_format, company_id, output_file):
+    """Render one report format to output_file (runs in a worker process)"""
+    from connectwise_report.models.time_entry import normalize_entries
+    from connectwise_report.reports.fragments import open_fragment_cache
+
+    time_entries = normalize_entries(raw_entries)
+    fragment_cache = open_fragment_cache()
+    workdir = tempfile.mkdtemp(prefix='report_')
+    try:
+        if report_format == 'docx':
+            from connectwise_report.reports.word_report import WordReport
+            rendered = WordReport(fragment_cache=fragment_cache).generate(time_entries, workdir, company_id)
+        else:
+            from connectwise_report.reports.html_report import HTMLReport
+            report = HTMLReport(fragment_cache=fragment_cache)
+            tickets_data = report._process_entries(time_entries)
+            rendered = os.path.join(workdir, 'report.html')
+            report.write_html(report.iter_html(tickets_data, company_id), rendered)
+            if report_format == 'pdf':
+                html_file, rendered = rendered, os.path.join(workdir, 'report.pdf')
+                report.pdf_backend.render(html_file, rendered, tickets_data=tickets_data, company_id=company_id)
+        # Move into place in one step so readers never see a partial artifact
+        partial = f"{output_file}.{os.getpid()}.tmp"
+        shutil.move(rendered, partial)
+        os.replace(partial, output_file)
+        return output_file
+    finally:
+        if fragment_cache is not None:
+            fragment_cache.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+class ArtifactStore:
+    """Directory of rendered reports named by artifact_key()"""
+
+    def __init__(self, root=ARTIFACT_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, key, report_format):
+        return os.path.join(self.root, key + REPORT_FORMATS[report_format])
+
+    def get(self, key, report_format):
+        """Return the artifact path if it has already been rendered"""
+        path = self.path(key, report_format)
+        return path if os.path.exists(path) else None
@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from connectwise_report.config.settings import FRAGMENT_CACHE_ENABLED, FRAGMENT_CACHE_PATH, FRAGMENT_CACHE_MAX_AGE_DAYS
+from connectwise_report.utils.metrics import METRICS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fragments (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    used_at REAL NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+CREATE INDEX IF NOT EXISTS idx_fragments_used_at ON fragments (used_at);
+"""
+
+# SQLite's default limit on ? parameters per statement
+LOOKUP_BATCH = 900
+
+# Seconds between used_at updates for a fragment that keeps being reused
+TOUCH_INTERVAL = 86400
+
+def fragment_key(version, values):
+    """Hash of everything a fragment is rendered from, plus the renderer's fragment version"""
+    digest = hashlib.sha256(f"{version}:".encode('utf-8'))
+    digest.update(json.dumps(values, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+class FragmentCache:
+    """SQLite store of rendered report fragments: HTML ticket sections, DOCX entry tables.
+
+    A fragment is keyed by fragment_key() of the normalized fields it was
+    rendered from, so an unchanged ticket or entry is spliced back in as-is
+    and only changed ones are rendered again. Fragments not used for
+    max_age_days are pruned when the cache is opened.
+    """
+
+    def __init__(self, path=FRAGMENT_CACHE_PATH, max_age_days=FRAGMENT_CACHE_MAX_AGE_DAYS):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self.prune(max_age_days)
+
+    def close(self):
+        self._conn.close()
+
+    def get_many(self, kind, keys):
+        """Return {key: fragment} for the keys already rendered, marking them used"""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        now = time.time()
+        stale = []
+        with self._lock, self._conn:
+            for i in range(0, len(keys), LOOKUP_BATCH):
+                batch = keys[i:i + LOOKUP_BATCH]
+                rows = self._conn.execute(
+                    f"SELECT key, data, used_at FROM fragments WHERE kind = ? AND key IN ({','.join('?' * len(batch))})",
+                    [kind] + batch,
+                ).fetchall()
+                for key, data, used_at in rows:
+                    found[key] = data
+                    if used_at < now - TOUCH_INTERVAL:
+                        stale.append((now, kind, key))
+            # Refreshing used_at at most daily keeps frequent reruns read-only
+            self._conn.executemany("UPDATE fragments SET used_at = ? WHERE kind = ? AND key = ?", stale)
+        METRICS.count('fragment_cache_requests_total', len(found), kind=kind, result='hit')
+        METRICS.count('fragment_cache_requests_total', len(keys) - len(found), kind=kind, result='miss')
+        return found
+
+    def put_many(self, kind, fragments):
+        """Store newly rendered fragments ({key: fragment})"""
+        if not fragments:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO fragments (kind, key, data, used_at) VALUES (?, ?, ?, ?)",
+                [(kind, key, data, now) for key, data in fragments.items()],
+            )
+
+    def prune(self, max_age_days):
+        """Drop fragments that have not been used for max_age_days"""
+        cutoff = time.time() - max_age_days * 86400
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM fragments WHERE used_at < ?", (cutoff,))
+
+def open_fragment_cache():
+    """A new connection to the fragment cache (close it when done), or None when FRAGMENT_CACHE_ENABLED is off"""
+    return FragmentCache() if FRAGMENT_CACHE_ENABLED else None
@@ -1,11 +1,24 @@
 import os
 from datetime import datetime
-import pytz
-import pdfkit
-from connectwise_report.utils.formatting import format_detail
+from html import escape
+from connectwise_report.models.time_entry import normalize_entries
+from connectwise_report.reports.fragments import fragment_key
+from connectwise_report.reports.pdf_backends import get_pdf_backend
+from connectwise_report.utils.metrics import METRICS
+
+# Bump when _generate_ticket_html's markup changes so cached ticket sections are re-rendered
+FRAGMENT_VERSION = 1
 
 class HTMLReport:
-    def __init__(self):
+    def __init__(self, pdf_backend=None, fragment_cache=None):
+        # Name or instance of a PDF backend; defaults to the PDF_BACKEND setting
+        if pdf_backend is None or isinstance(pdf_backend, str):
+            pdf_backend = get_pdf_backend(pdf_backend)
+        self.pdf_backend = pdf_backend
+        # Optional FragmentCache; ticket sections that have not changed since
+        # an earlier run are reused instead of rendered again
+        self.fragment_cache = fragment_cache
+
         # CSS styles for the HTML report
         self.css = """
             body{font-family:Calibri,sans-serif;margin:40px;background-color:#f5f5f5}
@@ -36,9 +49,15 @@ class HTMLReport:
 
     def generate(self, time_entries, output_dir, company_id):
         """Generate both HTML and PDF reports"""
-        tickets_data = self._process_entries(time_entries)
-        html_content = self._generate_html(tickets_data, company_id)
-        self._save_reports(html_content, output_dir, company_id)
+        self.save(self._process_entries(time_entries), output_dir, company_id)
+
+    def save(self, tickets_data, output_dir, company_id, name_suffix=''):
+        """Write the HTML and PDF reports for ticket data from _process_entries"""
+        self._save_reports(self.iter_html(tickets_data, company_id), output_dir, company_id, tickets_data, name_suffix)
+
+    def stream(self, time_entries, company_id):
+        """Yield the HTML report in chunks, e.g. for a StreamingResponse"""
+        return self.iter_html(self._process_entries(time_entries), company_id)
 
     def _format_notes(self, notes):
         """Format notes to put each # item on its own line"""
@@ -56,18 +75,18 @@ class HTMLReport:
         
         return '<br>'.join(formatted_lines)
 
-    def _process_entries(self, time_entries):
-        """Process time entries into ticket-grouped data"""
-        tickets_data = {}
-        
-        def get_ticket_id(entry):
-            ticket = entry.get('ticket', {})
-            if isinstance(ticket, dict):
-                return str(ticket.get('id', ''))  # Convert to string for consistent comparison
-            return ''
+    def _process_entries(self, time_entries, tickets_data=None):
+        """Process time entries into ticket-grouped data.
+
+        Pass the tickets_data from earlier calls to add entries that arrive
+        in chunks; only the per-entry rows are kept, not the entries.
+        """
+        if tickets_data is None:
+            tickets_data = {}
+        time_entries = normalize_entries(time_entries)
         
         for entry in time_entries:
-            ticket_id = get_ticket_id(entry)
+            ticket_id = entry.ticket_id
             if not ticket_id:  # Skip entries without valid ticket IDs
                 continue
             
@@ -75,42 +94,39 @@ class HTMLReport:
                 tickets_data[ticket_id] = {
                     'details': entry,
                     'entries': [],
-                    'total_hours': 0,
-                    'board': entry.get('ticketBoard', 'Unknown Board'),
-                    'status': entry.get('ticketStatus', 'Unknown Status'),
-                    'summary': entry.get('ticket', {}).get('summary', '')
+                    'total_hours': 0.0,
+                    'board': entry.board,
+                    'status': entry.status,
+                    'summary': entry.ticket_summary
                 }
             
-            # Convert UTC to NZ time for both start and end times
-            start_date = datetime.fromisoformat(entry['timeStart'].replace('Z', '+00:00'))
-            end_date = datetime.fromisoformat(entry['timeEnd'].replace('Z', '+00:00'))
-            nz_start = start_date.astimezone(pytz.timezone('Pacific/Auckland'))
-            nz_end = end_date.astimezone(pytz.timezone('Pacific/Auckland'))
-            
-            formatted_notes = format_detail(entry.get('notes', ''), entry.get('project', None))
-            
-            # Add entry details
+            # Add entry details (times are already in NZ time)
             tickets_data[ticket_id]['entries'].append({
-                'date': nz_start.strftime('%Y-%m-%d'),
-                'start_time': nz_start.strftime('%I:%M %p'),
-                'end_time': nz_end.strftime('%I:%M %p'),
-                'hours': entry.get('actualHours', 0),
-                'engineer': entry.get('member', {}).get('name'),
-                'work_type': entry.get('workType', {}).get('name'),
-                'notes': formatted_notes
+                'date': entry.start.strftime('%Y-%m-%d'),
+                'start_time': entry.start.strftime('%I:%M %p'),
+                'end_time': entry.end.strftime('%I:%M %p'),
+                'hours': entry.hours,
+                'engineer': entry.engineer,
+                'work_type': entry.work_type,
+                'notes': entry.html_notes
             })
-            tickets_data[ticket_id]['total_hours'] += entry.get('actualHours', 0)
         
+        # Per-ticket totals come from the vectorized rollup (pandas loads here,
+        # on first use, rather than when the module is imported)
+        from connectwise_report.reports.analytics import entries_frame, ticket_hours
+        for ticket_id, total_hours in ticket_hours(entries_frame(time_entries)).items():
+            if ticket_id in tickets_data:
+                tickets_data[ticket_id]['total_hours'] += total_hours
+
         return tickets_data
 
     def _generate_html(self, tickets_data, company_id):
-        """Generate the complete HTML document"""
-        tickets_html = []
-        for ticket_id, data in tickets_data.items():
-            ticket_html = self._generate_ticket_html(ticket_id, data)
-            tickets_html.append(ticket_html)
+        """Generate the complete HTML document as one string"""
+        return ''.join(self.iter_html(tickets_data, company_id))
 
-        return f"""<!DOCTYPE html>
+    def iter_html(self, tickets_data, company_id):
+        """Generate the HTML document one ticket at a time"""
+        yield f"""<!DOCTYPE html>
             <html>
             <head>
                 <title>ConnectWise Debug Report</title>
@@ -122,41 +138,66 @@ class HTMLReport:
                         <h1>ConnectWise Debug Report</h1>
                         <div class="meta-info">
                             <p>Report Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-                            <p>Company ID: {company_id}</p>
+                            <p>Company ID: {escape(str(company_id))}</p>
                         </div>
                     </div>
-                    {''.join(tickets_html)}
+                    """
+        if self.fragment_cache is None:
+            for ticket_id, data in tickets_data.items():
+                yield self._generate_ticket_html(ticket_id, data)
+        else:
+            yield from self._iter_ticket_html_cached(tickets_data)
+        yield """
                 </div>
             </body>
             </html>"""
 
+    def _ticket_fragment_key(self, ticket_id, data):
+        """Fragment key of a ticket section: every value _generate_ticket_html renders"""
+        return fragment_key(FRAGMENT_VERSION, [
+            ticket_id, data['summary'], data['board'], data['status'], data['total_hours'], data['entries'],
+        ])
+
+    def _iter_ticket_html_cached(self, tickets_data):
+        """Yield ticket sections from the fragment cache, rendering only new or changed tickets"""
+        keys = {ticket_id: self._ticket_fragment_key(ticket_id, data) for ticket_id, data in tickets_data.items()}
+        cached = self.fragment_cache.get_many('html_ticket', keys.values())
+        rendered = {}
+        for ticket_id, data in tickets_data.items():
+            key = keys[ticket_id]
+            html = cached.get(key)
+            if html is None:
+                html = rendered[key] = self._generate_ticket_html(ticket_id, data)
+            yield html
+        self.fragment_cache.put_many('html_ticket', rendered)
+
     def _generate_ticket_html(self, ticket_id, data):
-        """Generate HTML for a single ticket"""
+        """Generate HTML for a single ticket, escaping every API-supplied value"""
         # Add ticket info section
         ticket_info = f"""
             <div class="ticket-info">
-                <p><strong>Board:</strong> {data['board']}</p>
-                <p><strong>Status:</strong> {data['status']}</p>
+                <p><strong>Board:</strong> {escape(str(data['board']))}</p>
+                <p><strong>Status:</strong> {escape(str(data['status']))}</p>
             </div>
         """
 
         entries_html = ''.join([
             f"""<tr>
-                <td>{entry['date']}</td>
-                <td>{entry['start_time']}</td>
-                <td>{entry['end_time']}</td>
-                <td>{entry['hours']}</td>
-                <td>{entry['engineer']}</td>
-                <td>{entry['work_type']}</td>
-                <td>{entry['notes']}</td>
+                <td>{escape(entry['date'])}</td>
+                <td>{escape(entry['start_time'])}</td>
+                <td>{escape(entry['end_time'])}</td>
+                <td>{escape(str(entry['hours']))}</td>
+                <td>{escape(str(entry['engineer']))}</td>
+                <td>{escape(str(entry['work_type']))}</td>
+                <td>{escape(entry['notes'])}</td>
             </tr>""" for entry in data['entries']
         ])
 
         return f"""
             <div class="ticket">
                 <div class="ticket-header">
-                    <h2>Ticket #{ticket_id}</h2>
-                    <p>{data['summary']}</p>
+                    <h2>Ticket #{escape(str(ticket_id))}</h2>
+                    <p>{escape(str(data['summary']))}</p>
                     {ticket_info}
                 </div>
                 <div class="ticket-details">
@@ -178,42 +219,32 @@ class HTMLReport:
                 </div>
             </div>"""
 
-    def _save_reports(self, html_content, output_dir, company_id):
+    def write_html(self, html_chunks, html_file):
+        """Write generated HTML chunks to a file as they are produced"""
+        with open(html_file, 'w', encoding='utf-8') as f:
+            for chunk in html_chunks:
+                f.write(chunk)
+
+    def _save_reports(self, html_chunks, output_dir, company_id, tickets_data=None, name_suffix=''):
         """Save both HTML and PDF versions of the report"""
         timestamp = datetime.now().strftime('%Y%m%d')
         
-        # Save HTML
-        html_file = os.path.join(output_dir, f"debug_report_{company_id}_{timestamp}.html")
-        with open(html_file, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        # Save HTML, writing each chunk as it is produced
+        html_file = os.path.join(output_dir, f"debug_report_{company_id}_{timestamp}{name_suffix}.html")
+        with METRICS.timer('html_build'):
+            self.write_html(html_chunks, html_file)
         print(f"HTML report saved to: {html_file}")
         
-        # Try to save PDF if pdfkit is available
+        # Try to save PDF if the configured backend's dependencies are available
         try:
-            import pdfkit
-            pdf_file = os.path.join(output_dir, f"debug_report_{company_id}_{timestamp}.pdf")
-            
-            options = {
-                'page-size': 'A4',
-                'orientation': 'Landscape',
-                'margin-top': '10mm',
-                'margin-right': '10mm',
-                'margin-bottom': '10mm',
-                'margin-left': '10mm',
-                'encoding': "UTF-8",
-                'no-outline': None,
-                'enable-local-file-access': None
-            }
-            
-            pdfkit.from_string(html_content, pdf_file, options=options)
+            pdf_file = os.path.join(output_dir, f"debug_report_{company_id}_{timestamp}{name_suffix}.pdf")
+            with METRICS.timer('pdf_convert', backend=self.pdf_backend.name):
+                self.pdf_backend.render(html_file, pdf_file, tickets_data=tickets_data, company_id=company_id)
             print(f"PDF report saved to: {pdf_file}")
             
         except ImportError:
-            print("\nNote: PDF generation is disabled. To enable:")
-            print("1. Install pdfkit: pip install pdfkit")
-            print("2. Install wkhtmltopdf:")
-            print("   Mac: brew install wkhtmltopdf")
-            print("   Ubuntu: sudo apt-get install wkhtmltopdf")
-            print("   Windows: Download from https://wkhtmltopdf.org/downloads.html")
+            print(f"\nNote: PDF generation is disabled. To enable the '{self.pdf_backend.name}' backend:")
+            for line in self.pdf_backend.install_hint:
+                print(line)
         except Exception as e:
-            print(f"\nWarning: Could not generate PDF - {str(e)}") 
\ No newline at end of file
+            print(f"\nWarning: Could not generate PDF - {str(e)}")
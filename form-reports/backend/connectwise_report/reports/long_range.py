@@ -0,0 +1,48 @@
+from itertools import groupby
+from connectwise_report.models.time_entry import normalize_entries
+
+def render_chunks(chunks, output_dir, company_id, formats=('html', 'docx'), volumes=False,
+                  title="Activity Report", fragment_cache=None):
+    """Render reports from ((window_start, window_end), raw entries) chunks, oldest first.
+
+    chunks is what iter_time_entries_chunked yields. Each chunk is
+    normalized, handed to the renderers and dropped, so only the documents
+    being built stay in memory. With volumes, each calendar month gets its
+    own files (suffixed _YYYY-MM), written as soon as its chunks are done;
+    months without entries are skipped. Returns the DOCX files written.
+    """
+    # Renderers are imported only when wanted, like app/main.py
+    if 'html' in formats:
+        from connectwise_report.reports.html_report import HTMLReport
+    if 'docx' in formats:
+        from connectwise_report.reports.word_report import WordReport
+
+    if volumes:
+        # date_windows never crosses a month boundary, so each window belongs to one volume
+        groups = groupby(chunks, key=lambda chunk: chunk[0][0].strftime('_%Y-%m'))
+    else:
+        groups = [('', chunks)]
+
+    docx_files = []
+    for name_suffix, group in groups:
+        html_report = HTMLReport(fragment_cache=fragment_cache) if 'html' in formats else None
+        word_report = WordReport(fragment_cache=fragment_cache) if 'docx' in formats else None
+        if word_report is not None:
+            word_report.add_title(title)
+        tickets_data = {}
+        entry_count = 0
+        for _, entries in group:
+            entries = normalize_entries(entries)
+            entry_count += len(entries)
+            if html_report is not None:
+                html_report._process_entries(entries, tickets_data)
+            if word_report is not None:
+                word_report.add_entries(entries)
+
+        if volumes and not entry_count:
+            continue
+        if html_report is not None:
+            html_report.save(tickets_data, output_dir, company_id, name_suffix)
+        if word_report is not None:
+            docx_files.append(word_report.save(output_dir, company_id, name_suffix))
+    return docx_files
@@ -0,0 +1,136 @@
+from abc import ABC, abstractmethod
+from html import escape
+from connectwise_report.config.settings import PDF_BACKEND
+
+# wkhtmltopdf options shared by the subprocess backends
+WKHTMLTOPDF_OPTIONS = {
+    'page-size': 'A4',
+    'orientation': 'Landscape',
+    'margin-top': '10mm',
+    'margin-right': '10mm',
+    'margin-bottom': '10mm',
+    'margin-left': '10mm',
+    'encoding': "UTF-8",
+    'no-outline': None,
+    'enable-local-file-access': None
+}
+
+WKHTMLTOPDF_INSTALL_HINT = [
+    "1. Install pdfkit: pip install pdfkit",
+    "2. Install wkhtmltopdf:",
+    "   Mac: brew install wkhtmltopdf",
+    "   Ubuntu: sudo apt-get install wkhtmltopdf",
+    "   Windows: Download from https://wkhtmltopdf.org/downloads.html",
+]
+
+class PDFBackend(ABC):
+    """Turns a saved HTML debug report (or its ticket data) into a PDF.
+
+    Backends import their dependencies lazily and raise ImportError from
+    render() when they are missing; install_hint says how to fix that.
+    For batches, prefer an in-process backend (weasyprint, reportlab):
+    wkhtmltopdf starts a process for every report.
+    """
+    name = None
+    install_hint = []
+
+    @abstractmethod
+    def render(self, html_file, pdf_file, tickets_data=None, company_id=None):
+        """Write pdf_file"""
+
+    def close(self):
+        """Release any long-lived resources"""
+
+class WkhtmltopdfBackend(PDFBackend):
+    """One wkhtmltopdf subprocess per report via pdfkit (the original behaviour)"""
+    name = 'wkhtmltopdf'
+    install_hint = WKHTMLTOPDF_INSTALL_HINT
+
+    def render(self, html_file, pdf_file, tickets_data=None, company_id=None):
+        import pdfkit
+        # Convert from the saved file so the document is never held in memory
+        pdfkit.from_file(html_file, pdf_file, options=WKHTMLTOPDF_OPTIONS)
+
+class WeasyPrintBackend(PDFBackend):
+    """In-process HTML to PDF with WeasyPrint, no subprocess or temp files"""
+    name = 'weasyprint'
+    install_hint = [
+        "1. Install WeasyPrint: pip install weasyprint",
+        "2. Install its Pango libraries: https://doc.courtbouillon.org/weasyprint/stable/first_steps.html",
+    ]
+    page_css = "@page { size: A4 landscape; margin: 10mm; }"
+
+    def render(self, html_file, pdf_file, tickets_data=None, company_id=None):
+        from weasyprint import HTML, CSS
+        HTML(filename=html_file).write_pdf(pdf_file, stylesheets=[CSS(string=self.page_css)])
+
+class ReportLabBackend(PDFBackend):
+    """In-process PDF drawn straight from the ticket data, skipping HTML layout"""
+    name = 'reportlab'
+    install_hint = ["1. Install ReportLab: pip install reportlab"]
+
+    def render(self, html_file, pdf_file, tickets_data=None, company_id=None):
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4, landscape
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.lib.units import mm
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, KeepTogether
+
+        if tickets_data is None:
+            raise ValueError("The reportlab backend renders from ticket data, not HTML")
+
+        styles = getSampleStyleSheet()
+        cell_style = styles['BodyText'].clone('cell', fontSize=8, leading=10)
+        header_green = colors.HexColor('#E5F3E2')
+
+        def para(value, style=cell_style):
+            # Paragraph understands a small markup language, so escape first
+            return Paragraph(escape(str(value)).replace('\n', '<br/>'), style)
+
+        doc = SimpleDocTemplate(
+            pdf_file, pagesize=landscape(A4),
+            leftMargin=10 * mm, rightMargin=10 * mm, topMargin=10 * mm, bottomMargin=10 * mm,
+        )
+        story = [Paragraph("ConnectWise Debug Report", styles['Title'])]
+        if company_id is not None:
+            story.append(para(f"Company ID: {company_id}", styles['Normal']))
+        story.append(Spacer(1, 6 * mm))
+
+        widths = [22 * mm, 20 * mm, 20 * mm, 14 * mm, 32 * mm, 28 * mm, None]
+        for ticket_id, data in tickets_data.items():
+            rows = [[para(h) for h in ("Date", "Start Time", "End Time", "Hours", "Engineer", "Work Type", "Notes")]]
+            for entry in data['entries']:
+                rows.append([para(entry[key]) for key in
+                             ('date', 'start_time', 'end_time', 'hours', 'engineer', 'work_type', 'notes')])
+            table = Table(rows, colWidths=widths, repeatRows=1)
+            table.setStyle(TableStyle([
+                ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#DDDDDD')),
+                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#F8F8F8')),
+                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ]))
+            header = Table([[para(f"Ticket #{ticket_id}", styles['Heading2'])],
+                            [para(data['summary'])],
+                            [para(f"Board: {data['board']}    Status: {data['status']}")]],
+                           colWidths=[None])
+            header.setStyle(TableStyle([('BACKGROUND', (0, 0), (-1, -1), header_green)]))
+            story.append(KeepTogether([header, table]))
+            story.append(para(f"Total Hours: {data['total_hours']:.2f}", styles['Normal']))
+            story.append(Spacer(1, 6 * mm))
+
+        doc.build(story)
+
+PDF_BACKENDS = {
+    backend.name: backend
+    for backend in (WkhtmltopdfBackend, WeasyPrintBackend, ReportLabBackend)
+}
+
+_shared_backends = {}
+
+def get_pdf_backend(name=None):
+    """Return the shared backend instance for name (default: PDF_BACKEND setting)"""
+    name = name or PDF_BACKEND
+    if name not in PDF_BACKENDS:
+        raise ValueError(f"Unknown PDF backend '{name}'. Choose from: {', '.join(PDF_BACKENDS)}")
+    if name not in _shared_backends:
+        _shared_backends[name] = PDF_BACKENDS[name]()
+    return _shared_backends[name]
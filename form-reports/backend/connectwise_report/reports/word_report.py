@@ -1,19 +1,39 @@
 import os
 import sys
+from copy import deepcopy
 from datetime import datetime
-import pandas as pd
-import pytz
 from docx import Document
 from docx.shared import Inches, Pt
 from docx.enum.section import WD_ORIENT
 from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_BREAK
 from docx.oxml import parse_xml, OxmlElement
+from docx.oxml.ns import nsdecls
 from docx.oxml.shared import qn
-from connectwise_report.utils.formatting import set_cell_background, format_detail, format_detail_cell
+from lxml import etree
+from connectwise_report.models.time_entry import normalize_entries
+from connectwise_report.reports.fragments import fragment_key
+from connectwise_report.utils.formatting import set_cell_background, format_detail, format_detail_cell, clean_ticket_summary
+from connectwise_report.utils.metrics import METRICS
+
+ENTRY_LABELS = ["Date", "Start Time", "End Time", "IT360 Ticket Ref", "Site Name", "Engineer", "Detail"]
+
+# Bump when the entry table layout changes so cached entry tables are re-rendered
+FRAGMENT_VERSION = 1
 
 class WordReport:
-    def __init__(self):
+    def __init__(self, fast_tables=True, fragment_cache=None):
         self.document = Document()
+        # fast_tables clones a pre-built table per entry instead of building
+        # every cell through python-docx; the XML produced is the same
+        self.fast_tables = fast_tables
+        self._table_template = None
+        # Optional FragmentCache; entry tables that have not changed since an
+        # earlier run are parsed back from their XML instead of rendered again
+        self.fragment_cache = fragment_cache
+        self._body_end = None
+        self._title = None
+        self._first_start = None
+        self._last_start = None
         self.set_default_styles()
 
     def set_default_styles(self):
@@ -23,36 +43,94 @@ class WordReport:
         
     def clean_ticket_summary(self, summary):
         """Clean up ticket summary by removing specific phrases"""
-        if not summary:
-            return 'N/A'
-        
-        # List of phrases to remove (including variations with brackets)
-        remove_phrases = [
-            "(DONT ADD TIME speak with Chris)",
-            "[DONT ADD TIME speak with Chris]",
-            "(DONT ADD TIME speak with chris)",
-            "[DONT ADD TIME speak with chris]",
-            "(DONT ADD TIME)",
-            "[DONT ADD TIME]",
-            "DONT ADD TIME",
-            "(speak with Chris)",
-            "[speak with Chris]",
-            "speak with Chris",
-            "(speak with chris)",
-            "[speak with chris]",
-            "speak with chris"
+        return clean_ticket_summary(summary)
+
+    def entry_rows(self, entry):
+        """Label/value rows for one entry's table (entry is a normalized TimeEntry)"""
+        return [
+            ("Date", entry.start.strftime('%d-%m-%Y')),
+            ("Start Time", entry.start.strftime('%I:%M %p')),
+            ("End Time", entry.end.strftime('%I:%M %p')),
+            ("IT360 Ticket Ref", entry.ticket_id or 'N/A'),
+            ("Site Name", entry.site_name),  # Added new row
+            ("Engineer", entry.engineer or 'N/A'),
+            ("Detail", entry.word_detail)
         ]
-        
-        cleaned_summary = summary
-        for phrase in remove_phrases:
-            cleaned_summary = cleaned_summary.replace(phrase, '').strip()
-        
-        # Clean up any leftover empty brackets
-        cleaned_summary = cleaned_summary.replace('()', '').replace('[]', '').strip()
-        
-        return cleaned_summary or 'N/A'  # Return 'N/A' if empty after cleaning
 
     def create_entry_table(self, entry):
+        """Append the spacer paragraph and table for one entry"""
+        self._append_entry_table(self.entry_rows(entry))
+
+    def _append_entry_table(self, rows):
+        """Append the spacer paragraph and table for one entry's rows and return the table element"""
+        if not self.fast_tables:
+            self.build_entry_table(rows)
+            return self.document.element.body.tbl_lst[-1]
+
+        spacer, template = self._entry_table_template()
+        tbl = deepcopy(template)
+        # Only the value column differs between entries; the labels, widths,
+        # shading and layout all come from the template
+        for tr, (_, value) in zip(tbl.tr_lst, rows):
+            tr.tc_lst[1].p_lst[0].r_lst[0].text = str(value)
+
+        self._append_to_body(deepcopy(spacer), tbl)
+        return tbl
+
+    def _append_to_body(self, *elements):
+        """Append elements at the end of the body, before its section properties.
+
+        python-docx's body._insert_p/_insert_tbl search the whole body for
+        sectPr on every call, which makes large reports quadratic; the
+        sectPr is looked up once instead.
+        """
+        body = self.document.element.body
+        if self._body_end is None:
+            self._body_end = body.sectPr
+        for element in elements:
+            if self._body_end is None:
+                body.append(element)
+            else:
+                self._body_end.addprevious(element)
+
+    def create_entry_tables_cached(self, entries):
+        """Append every entry's table, reusing cached table XML for entries that have not changed"""
+        rows = [self.entry_rows(entry) for entry in entries]
+        keys = [fragment_key(FRAGMENT_VERSION, [str(value) for _, value in entry_rows]) for entry_rows in rows]
+        cached = self.fragment_cache.get_many('docx_entry', keys)
+        spacer, _ = self._entry_table_template()
+
+        # Parse every reused table in one go; parse_xml per fragment costs more than the lookup saves
+        reused = iter(self._parse_fragments([cached[key] for key in keys if key in cached]))
+        rendered = {}
+        for entry_rows, key in zip(rows, keys):
+            if key in cached:
+                self._append_to_body(deepcopy(spacer), next(reused))
+            else:
+                tbl = self._append_entry_table(entry_rows)
+                rendered[key] = etree.tostring(tbl, encoding='unicode')
+        self.fragment_cache.put_many('docx_entry', rendered)
+
+    def _parse_fragments(self, fragments):
+        """Parse cached table XML fragments into elements, in order"""
+        if not fragments:
+            return []
+        return list(parse_xml(f"<w:body {nsdecls('w')}>{''.join(fragments)}</w:body>"))
+
+    def _entry_table_template(self):
+        """Build one entry table through python-docx and keep its XML as a clone template"""
+        if self._table_template is None:
+            body = self.document.element.body
+            self.build_entry_table([(label, '') for label in ENTRY_LABELS])
+            tbl = body.tbl_lst[-1]
+            spacer = tbl.getprevious()
+            body.remove(spacer)
+            body.remove(tbl)
+            self._table_template = (spacer, tbl)
+        return self._table_template
+
+    def build_entry_table(self, rows):
+        """Build an entry table cell by cell through python-docx"""
         # Add some spacing before table
         self.document.add_paragraph()
         
@@ -96,42 +174,6 @@ class WordReport:
         # Define light green color (RGB: 204, 255, 204)
         green_color = "CCFFCC"
 
-        def shorten_url(text):
-            """Helper to shorten URLs in text"""
-            # Look for SharePoint URLs with specific patterns
-            if 'sharepoint.com' in text.lower():
-                # Extract the base part of the URL
-                if '?sourcedoc=' in text:
-                    base_url = text.split('?sourcedoc=')[0]
-                    return f"{base_url} [...]"
-                elif '&file=' in text:
-                    base_url = text.split('&file=')[0]
-                    return f"{base_url} [...]"
-            return text
-
-        # Convert UTC to NZ time for both start and end times
-        start_date = datetime.fromisoformat(entry['timeStart'].replace('Z', '+00:00'))
-        end_date = datetime.fromisoformat(entry['timeEnd'].replace('Z', '+00:00'))
-        nz_tz = pytz.timezone('Pacific/Auckland')
-        nz_start = start_date.astimezone(nz_tz)
-        nz_end = end_date.astimezone(nz_tz)
-
-        # Get ticket info
-        ticket = entry.get('ticket', {})
-        ticket_id = str(ticket.get('id', 'N/A'))
-        ticket_summary = self.clean_ticket_summary(ticket.get('summary', 'N/A'))
-
-        # Populate table rows with correct field mappings
-        rows = [
-            ("Date", nz_start.strftime('%d-%m-%Y')),
-            ("Start Time", nz_start.strftime('%I:%M %p')),
-            ("End Time", nz_end.strftime('%I:%M %p')),
-            ("IT360 Ticket Ref", ticket_id),
-            ("Site Name", ticket_summary),  # Added new row
-            ("Engineer", entry.get('member', {}).get('name', 'N/A')),
-            ("Detail", entry.get('notes', ''))
-        ]
-
         for i, (label, value) in enumerate(rows):
             # Format left column
             left_cell = table.cell(i, 0)
@@ -141,20 +183,7 @@ class WordReport:
             
             # Format right column
             right_cell = table.cell(i, 1)
-            if label == "Detail":
-                # Handle multiline detail text
-                lines = value.split('\n')
-                formatted_lines = []
-                for line in lines:
-                    if line.strip():  # Only process non-empty lines
-                        # Shorten URLs in the line
-                        line = shorten_url(line.strip())
-                        if not line.startswith('-'):
-                            line = f"- {line}"
-                        formatted_lines.append(line)
-                right_cell.text = '\n'.join(formatted_lines)
-            else:
-                right_cell.text = str(value)
+            right_cell.text = str(value)
 
             # Ensure cell widths are fixed
             left_cell._tc.tcPr.tcW.type = 'dxa'
@@ -165,43 +194,67 @@ class WordReport:
         cell._tc.get_or_add_tcPr().append(parse_xml(f'<w:shd xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" w:fill="{color}"/>'))
 
     def generate(self, entries, output_dir, company_id):
-        # Add title
-        title = self.document.add_paragraph("Weekly Activity Report")
+        self.add_title()
+        self.add_entries(entries)
+        return self.save(output_dir, company_id)
+
+    def add_title(self, text="Weekly Activity Report"):
+        title = self.document.add_paragraph(text)
         title.alignment = WD_ALIGN_PARAGRAPH.CENTER
         title.runs[0].font.bold = True
         title.runs[0].font.size = Pt(14)
+        self._title = title
+
+    def add_entries(self, entries):
+        """Add a table for each entry.
 
+        May be called once per chunk of a long range; chunks must arrive in
+        time order without overlapping, since each is sorted on its own.
+        The entries are not kept once their tables are built.
+        """
         # Filter out entries with excluded words in ticket summary
         excluded_words = ["Meetings", "Documentation"]
         filtered_entries = [
-            entry for entry in entries 
-            if not any(word.lower() in entry.get('ticket', {}).get('summary', '').lower() 
+            entry for entry in normalize_entries(entries)
+            if not any(word.lower() in entry.ticket_summary.lower()
                       for word in excluded_words)
         ]
 
         # Sort entries by timeStart
-        sorted_entries = sorted(filtered_entries, key=lambda x: x['timeStart'])
-        
-        # Add date range subheading
-        if sorted_entries:
-            first_entry = sorted_entries[0]
-            last_entry = sorted_entries[-1]
-            start_date = datetime.fromisoformat(first_entry['timeStart'].replace('Z', '+00:00'))
-            end_date = datetime.fromisoformat(last_entry['timeStart'].replace('Z', '+00:00'))
-            nz_tz = pytz.timezone('Pacific/Auckland')
-            nz_start = start_date.astimezone(nz_tz)
-            nz_end = end_date.astimezone(nz_tz)
-            
-            date_range = self.document.add_paragraph(f"{nz_start.strftime('%d-%m-%Y')} to {nz_end.strftime('%d-%m-%Y')}")
-            date_range.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            date_range.runs[0].font.size = Pt(12)
+        sorted_entries = sorted(filtered_entries, key=lambda x: x.time_start)
+        if not sorted_entries:
+            return
+
+        # Remember the span for the date range subheading
+        if self._first_start is None:
+            self._first_start = sorted_entries[0].start
+        self._last_start = sorted_entries[-1].start
 
         # Create a table for each entry
-        for entry in sorted_entries:
-            self.create_entry_table(entry)
+        with METRICS.timer('docx_build'):
+            if self.fragment_cache is None:
+                for entry in sorted_entries:
+                    self.create_entry_table(entry)
+            else:
+                self.create_entry_tables_cached(sorted_entries)
+
+    def save(self, output_dir, company_id, name_suffix=''):
+        """Add the date range subheading under the title and save the document"""
+        if self._first_start is not None:
+            date_range = self.document.add_paragraph(
+                f"{self._first_start.strftime('%d-%m-%Y')} to {self._last_start.strftime('%d-%m-%Y')}"
+            )
+            date_range.alignment = WD_ALIGN_PARAGRAPH.CENTER
+            date_range.runs[0].font.size = Pt(12)
+            # The span is only known once every entry is in, so move it up
+            if self._title is not None:
+                self._title._p.addnext(date_range._p)
+            else:
+                self.document.element.body.insert(0, date_range._p)
 
         # Save document
         timestamp = datetime.now().strftime("%Y%m%d")
-        filename = f"{output_dir}/activity_report_{company_id}_{timestamp}.docx"
-        self.document.save(filename)
-        return filename
\ No newline at end of file
+        filename = f"{output_dir}/activity_report_{company_id}_{timestamp}{name_suffix}.docx"
+        with METRICS.timer('docx_save'):
+            self.document.save(filename)
+        return filename
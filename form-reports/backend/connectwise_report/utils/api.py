@@ -1,30 +1,369 @@
-import requests
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from urllib.parse import urlparse, parse_qs
 import sys
-from connectwise_report.config.settings import CW_URL, CW_HEADERS
+from connectwise_report.config.settings import (
+    CW_URL, CW_HEADERS, CW_PAGE_SIZE, CW_MAX_WORKERS, CW_POOL_SIZE, CW_TIMEOUT, CW_MAX_RETRIES, QUERY_PROFILES,
+    LONG_RANGE_CHUNK_DAYS, LONG_RANGE_FETCH_WORKERS
+)
+from connectwise_report.utils.dates import date_windows
+from connectwise_report.utils.entry_store import utc_timestamp
+from connectwise_report.utils.lookups import (
+    LOOKUPS, LOOKUP_CACHE, collect_lookup_ids, cached_lookups, lookup_batches, build_lookup_params, lookup_record,
+    store_lookups, apply_lookups
+)
+from connectwise_report.utils.metrics import METRICS
+from connectwise_report.utils.resilience import (
+    RETRYABLE_STATUS, CircuitOpenError, TokenBucket, CircuitBreaker, backoff_delay
+)
+
+# requests is imported where it is used, so processes that only use the
+# async client (the API) never load it
+
+# One rate limiter and circuit breaker per process, shared by the sync
+# helpers and every AsyncConnectWiseClient (utils/async_api.py)
+RATE_LIMITER = TokenBucket()
+CIRCUIT_BREAKER = CircuitBreaker()
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """Return the shared keep-alive session, creating it on first use"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            # One pooled adapter so parallel page fetches reuse TCP/TLS connections
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=CW_POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+def _send(method, url, headers, params=None, data=None):
+    """Send a request through the shared session and return the raw response.
+
+    Every attempt waits for the rate limiter and is refused while the circuit
+    breaker is open. GETs are idempotent, so they are retried with backoff on
+    throttling, gateway errors and connection failures.
+    """
+    import requests
+    method = method.upper()
+    retries = CW_MAX_RETRIES if method == 'GET' else 0
+    for attempt in range(retries + 1):
+        trial = CIRCUIT_BREAKER.check()
+        try:
+            time.sleep(RATE_LIMITER.reserve())
+            try:
+                response = get_session().request(
+                    method, url, headers=headers, params=params, json=data, timeout=CW_TIMEOUT
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                CIRCUIT_BREAKER.record_failure()
+                if attempt == retries:
+                    raise
+                time.sleep(backoff_delay(attempt))
+                continue
+            delay = _retry_delay(response.status_code, response.headers, attempt, retries)
+        finally:
+            # An interrupted or unexpected-error trial must not leave the circuit stuck half-open
+            if trial is not None:
+                CIRCUIT_BREAKER.end_trial(trial)
+        if delay is None:
+            break
+        time.sleep(delay)
+    response.raise_for_status()
+    return response
+
+def _retry_delay(status_code, headers, attempt, retries):
+    """Record a response with the breaker; return the wait before retrying, or None to stop"""
+    if status_code not in RETRYABLE_STATUS:
+        CIRCUIT_BREAKER.record_success()
+        return None
+    delay = backoff_delay(attempt, headers.get('Retry-After'))
+    if status_code == 429:
+        # Throttling means ConnectWise is up; hold back every worker through
+        # the shared limiter, which the retry then waits on
+        CIRCUIT_BREAKER.record_success()
+        RATE_LIMITER.defer(delay)
+        delay = 0
+    else:
+        CIRCUIT_BREAKER.record_failure()
+    return delay if attempt < retries else None
+
+def _print_request_error(e):
+    print(f"Error in API request: {str(e)}", file=sys.stderr)
+    response = getattr(e, 'response', None)
+    if hasattr(response, 'text'):
+        print(f"Response content: {response.text}", file=sys.stderr)
 
 def request(method, url, headers, params=None, data=None):
     """Generic function to handle HTTP requests"""
+    import requests
     try:
-        if method.lower() == "get":
-            response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"Error in API request: {str(e)}", file=sys.stderr)
-        if hasattr(e.response, 'text'):
-            print(f"Response content: {e.response.text}", file=sys.stderr)
+        return _send(method, url, headers, params=params, data=data).json()
+    except (requests.exceptions.RequestException, CircuitOpenError) as e:
+        _print_request_error(e)
         return None
 
-def get_time_entries(start_date, end_date, company_id):
-    """Get time entries for date range and company"""
-    url = f"{CW_URL}time/entries"
-    conditions = (f"company/id={company_id} "
-                 f"and timeStart>=[{start_date.strftime('%Y-%m-%d')}T00:00:00Z] "
-                 f"and timeStart<[{end_date.strftime('%Y-%m-%d')}T00:00:00Z]")
-    
+def _count_page(response, data):
+    METRICS.count('cw_response_bytes_total', len(response.content))
+    METRICS.count('report_entries_total', len(data), source='connectwise')
+
+def _last_page_from_links(response):
+    """Read the last page number from the Link header, if ConnectWise sent one"""
+    last = response.links.get('last', {}).get('url')
+    if not last:
+        return None
+    page = parse_qs(urlparse(last).query).get('page')
+    return int(page[0]) if page else None
+
+def count_params(params):
+    """The part of a list query the /count endpoint accepts"""
+    return {k: v for k, v in params.items() if k in ('conditions', 'childConditions', 'customFieldConditions')}
+
+def _count_pages(url, headers, params, page_size):
+    """Ask the /count endpoint how many pages a query spans"""
+    result = request("get", f"{url}/count", headers, params=count_params(params))
+    if not result or 'count' not in result:
+        return None
+    return max(1, math.ceil(result['count'] / page_size))
+
+def fetch_all_pages(url, headers, params, page_size=CW_PAGE_SIZE, max_workers=CW_MAX_WORKERS):
+    """Fetch every page of a list endpoint.
+
+    The first page is fetched on its own to learn the total; the remaining
+    pages are then fetched concurrently and stitched back together in order.
+    Returns None if any page fails so callers never see a truncated list.
+    """
+    import requests
+
+    def fetch_page(page):
+        page_params = dict(params, page=page, pageSize=page_size)
+        with METRICS.timer('cw_page_fetch'):
+            response = _send("get", url, headers, params=page_params)
+            data = response.json()
+        _count_page(response, data)
+        return response, data
+
+    try:
+        first_response, first_page = fetch_page(1)
+        if len(first_page) < page_size:
+            return first_page
+
+        total_pages = _last_page_from_links(first_response)
+        if total_pages is None:
+            total_pages = _count_pages(url, headers, params, page_size)
+
+        if total_pages is None:
+            # No total available - walk pages sequentially until a short one
+            results = list(first_page)
+            page = 2
+            while True:
+                _, data = fetch_page(page)
+                results.extend(data)
+                if len(data) < page_size:
+                    return results
+                page += 1
+
+        results = list(first_page)
+        if total_pages > 1:
+            workers = min(max_workers, total_pages - 1)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for _, data in executor.map(fetch_page, range(2, total_pages + 1)):
+                    results.extend(data)
+        return results
+    except (requests.exceptions.RequestException, CircuitOpenError) as e:
+        _print_request_error(e)
+        return None
+
+def build_time_entries_params(start_date, end_date, company_id, profile='full', updated_since=None):
+    """Build the ConnectWise query for a company's time entries in a date range.
+
+    The named profile (see QUERY_PROFILES) adds a fields= projection and
+    turns summary exclusions into conditions so ConnectWise does the filtering.
+    """
+    options = QUERY_PROFILES[profile]
+    conditions = [
+        f"company/id={company_id}",
+        f"timeStart>=[{start_date.strftime('%Y-%m-%d')}T00:00:00Z]",
+        f"timeStart<[{end_date.strftime('%Y-%m-%d')}T00:00:00Z]",
+    ]
+    if updated_since:
+        # Incremental refresh: only entries touched since the last sync
+        conditions.append(f"lastUpdated>[{updated_since}]")
+    for word in options.get('exclude_summary_words', []):
+        # 'not like' alone would also drop entries with no ticket at all
+        word = word.replace('"', '\\"')
+        conditions.append(f'(ticket/summary not like "%{word}%" or ticket/id = null)')
+
     params = {
-        "conditions": conditions,
+        "conditions": " and ".join(conditions),
         "orderBy": "timeStart desc"
     }
-    
-    return request("get", url, CW_HEADERS, params=params) 
\ No newline at end of file
+    if options.get('fields'):
+        params["fields"] = ",".join(options['fields'])
+    return params
+
+def get_time_entries(start_date, end_date, company_id, profile='full'):
+    """Get time entries for date range and company"""
+    url = f"{CW_URL}time/entries"
+    params = build_time_entries_params(start_date, end_date, company_id, profile)
+    return _enrich_for_profile(fetch_all_pages(url, CW_HEADERS, params), profile)
+
+def iter_time_entries_chunked(start_date, end_date, company_id, store=None, profile='full',
+                              chunk_days=LONG_RANGE_CHUNK_DAYS, max_workers=LONG_RANGE_FETCH_WORKERS):
+    """Yield ((window_start, window_end), entries) across a long date range, oldest window first.
+
+    The range is split into date windows (see date_windows) that are fetched
+    in parallel, through the EntryStore when one is given. At most
+    max_workers windows are in flight or waiting to be consumed, so memory
+    stays flat however long the range is. An entry already yielded is
+    dropped by id, in case it moved windows between fetches. Raises
+    RuntimeError if a window cannot be fetched, so a report is never built
+    from part of the range.
+    """
+    def fetch(window):
+        if store is None:
+            return get_time_entries(window[0], window[1], company_id, profile)
+        return get_time_entries_cached(window[0], window[1], company_id, store, profile)
+
+    windows = iter(date_windows(start_date, end_date, chunk_days))
+    seen = set()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque((window, executor.submit(fetch, window)) for window in islice(windows, max_workers))
+        try:
+            while pending:
+                window, future = pending.popleft()
+                entries = future.result()
+                if entries is None:
+                    raise RuntimeError(f"Could not fetch time entries for {window[0]:%Y-%m-%d} to {window[1]:%Y-%m-%d}")
+                for next_window in islice(windows, 1):
+                    pending.append((next_window, executor.submit(fetch, next_window)))
+                entries = [entry for entry in entries if entry['id'] not in seen]
+                seen.update(entry['id'] for entry in entries)
+                yield window, entries
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+def build_active_companies_params(start_date, end_date):
+    """Query for the company of every time entry in a date range"""
+    return {
+        "conditions": (f"timeStart>=[{start_date.strftime('%Y-%m-%d')}T00:00:00Z] "
+                       f"and timeStart<[{end_date.strftime('%Y-%m-%d')}T00:00:00Z]"),
+        "fields": "company/id",
+    }
+
+def _company_ids(entries):
+    return sorted({entry['company']['id'] for entry in entries if entry.get('company')})
+
+def get_active_company_ids(start_date, end_date):
+    """Return the IDs of every company with time entered in a date range"""
+    url = f"{CW_URL}time/entries"
+    entries = fetch_all_pages(url, CW_HEADERS, build_active_companies_params(start_date, end_date))
+    if entries is None:
+        return None
+    return _company_ids(entries)
+
+def get_time_entries_cached(start_date, end_date, company_id, store, profile='full'):
+    """Get time entries through the local EntryStore.
+
+    Never-synced windows are fetched in full; synced windows are refreshed
+    with only the entries updated since the last sync (and refetched in
+    full if the store's count no longer matches ConnectWise's), and settled
+    past windows are read straight from the store. If ConnectWise is down (or
+    the circuit breaker is open) a synced window is served stale.
+    """
+    synced_at = store.last_sync(company_id, start_date, end_date, profile)
+    if synced_at is not None and not store.needs_refresh(start_date, end_date, synced_at):
+        METRICS.count('entry_store_requests_total', result='hit')
+        return _enrich_for_profile(store.get_entries(company_id, start_date, end_date, profile), profile)
+    METRICS.count('entry_store_requests_total', result='miss' if synced_at is None else 'refresh')
+
+    sync_started = utc_timestamp()
+    url = f"{CW_URL}time/entries"
+    params = build_time_entries_params(start_date, end_date, company_id, profile, updated_since=synced_at)
+    entries = fetch_all_pages(url, CW_HEADERS, params)
+    if entries is None:
+        entries = _stale_entries(store, company_id, start_date, end_date, profile, synced_at)
+    else:
+        store.save_entries(company_id, entries, start_date, end_date, sync_started, profile,
+                           replace=synced_at is None)
+        if synced_at is not None:
+            _reconcile_window(store, company_id, start_date, end_date, profile, sync_started)
+        entries = store.get_entries(company_id, start_date, end_date, profile)
+    return _enrich_for_profile(entries, profile)
+
+def _reconcile_window(store, company_id, start_date, end_date, profile, sync_started):
+    """Refetch a window in full when ConnectWise and the store disagree on its entry count.
+
+    Incremental lastUpdated> refreshes cannot see entries deleted in
+    ConnectWise or moved out of the window; either leaves the store with
+    more entries than ConnectWise reports.
+    """
+    url = f"{CW_URL}time/entries"
+    params = build_time_entries_params(start_date, end_date, company_id, profile)
+    result = request("get", f"{url}/count", CW_HEADERS, params=count_params(params))
+    if not result or 'count' not in result:
+        return
+    if result['count'] == store.count_entries(company_id, start_date, end_date, profile):
+        return
+    METRICS.count('entry_store_requests_total', result='reconcile')
+    entries = fetch_all_pages(url, CW_HEADERS, params)
+    if entries is not None:
+        store.save_entries(company_id, entries, start_date, end_date, sync_started, profile, replace=True)
+
+def _stale_entries(store, company_id, start_date, end_date, profile, synced_at):
+    """Fall back to the last synced copy of a window when ConnectWise is unavailable"""
+    if synced_at is None:
+        return None
+    print(f"Warning: ConnectWise unavailable, serving time entries last synced at {synced_at}", file=sys.stderr)
+    METRICS.count('entry_store_requests_total', result='stale')
+    return store.get_entries(company_id, start_date, end_date, profile)
+
+def _enrich_for_profile(entries, profile):
+    """Enrich entries fetched with a profile that asks for it (see QUERY_PROFILES)"""
+    if entries is None or not QUERY_PROFILES[profile].get('enrich'):
+        return entries
+    return enrich_entries(entries)
+
+def enrich_entries(entries, cache=LOOKUP_CACHE):
+    """Fill in the ticket boards and statuses, project and member names that entries leave out.
+
+    The distinct IDs of the whole batch are resolved in a few bulk
+    conditions=id in (...) queries through the shared lookup cache, never
+    one request per ticket. Details that cannot be fetched stay missing, so
+    the reports fall back to "Unknown Board" and "Unknown Status".
+    """
+    with METRICS.timer('enrich'):
+        found, missing = cached_lookups(cache, collect_lookup_ids(entries))
+        for kind, ids in missing.items():
+            found[kind].update(_fetch_lookups(kind, ids, cache))
+        return apply_lookups(entries, found)
+
+def _fetch_lookups(kind, ids, cache):
+    """Fetch one kind of record in batches, trying its endpoints in turn for the IDs still missing"""
+    endpoints, fields = LOOKUPS[kind]
+    records = {}
+    complete = True
+    remaining = ids
+    for endpoint in endpoints:
+        for batch in lookup_batches(remaining):
+            rows = fetch_all_pages(f"{CW_URL}{endpoint}", CW_HEADERS, build_lookup_params(batch, fields))
+            if rows is None:
+                complete = False
+                continue
+            records.update((row['id'], lookup_record(kind, row)) for row in rows)
+        remaining = [lookup_id for lookup_id in remaining if lookup_id not in records]
+        if not remaining or not complete:
+            break
+    store_lookups(cache, kind, ids, records, complete)
+    return records
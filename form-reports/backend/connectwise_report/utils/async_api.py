@@ -0,0 +1,247 @@
+import asyncio
+import math
+import httpx
+from connectwise_report.config.settings import (
+    CW_URL, CW_HEADERS, CW_PAGE_SIZE, CW_MAX_WORKERS, CW_POOL_SIZE, CW_TIMEOUT, CW_MAX_RETRIES, QUERY_PROFILES
+)
+from connectwise_report.utils.api import (
+    RATE_LIMITER, CIRCUIT_BREAKER, build_active_companies_params, build_time_entries_params, count_params, _company_ids,
+    _count_page, _last_page_from_links, _print_request_error, _retry_delay, _stale_entries
+)
+from connectwise_report.utils.entry_store import utc_timestamp
+from connectwise_report.utils.lookups import (
+    LOOKUPS, LOOKUP_CACHE, collect_lookup_ids, cached_lookups, lookup_batches, build_lookup_params, lookup_record,
+    store_lookups, apply_lookups
+)
+from connectwise_report.utils.metrics import METRICS
+from connectwise_report.utils.resilience import CircuitOpenError, backoff_delay
+
+class AsyncConnectWiseClient:
+    """Asyncio ConnectWise client for the API process.
+
+    Holds one pooled httpx.AsyncClient; create it once per app (see the
+    lifespan in app/server.py) and close it with aclose() on shutdown.
+    """
+
+    def __init__(self, base_url=CW_URL, headers=None, page_size=CW_PAGE_SIZE, max_workers=CW_MAX_WORKERS,
+                 max_retries=CW_MAX_RETRIES):
+        self.base_url = base_url
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.client = httpx.AsyncClient(
+            headers=headers if headers is not None else CW_HEADERS,
+            timeout=CW_TIMEOUT,
+            limits=httpx.Limits(max_connections=CW_POOL_SIZE, max_keepalive_connections=CW_POOL_SIZE),
+        )
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def _send(self, url, params=None):
+        """Async counterpart of _send(): rate limited, circuit broken and retried"""
+        retries = self.max_retries
+        for attempt in range(retries + 1):
+            trial = CIRCUIT_BREAKER.check()
+            try:
+                await asyncio.sleep(RATE_LIMITER.reserve())
+                try:
+                    response = await self.client.get(url, params=params)
+                except httpx.TransportError:
+                    CIRCUIT_BREAKER.record_failure()
+                    if attempt == retries:
+                        raise
+                    await asyncio.sleep(backoff_delay(attempt))
+                    continue
+                delay = _retry_delay(response.status_code, response.headers, attempt, retries)
+            finally:
+                # Also covers cancellation (client disconnects, cancelled prefetch/scheduler tasks)
+                if trial is not None:
+                    CIRCUIT_BREAKER.end_trial(trial)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+        response.raise_for_status()
+        return response
+
+    async def request(self, url, params=None):
+        """Async counterpart of request(): returns parsed JSON or None on error"""
+        try:
+            return (await self._send(url, params=params)).json()
+        except (httpx.HTTPError, CircuitOpenError) as e:
+            _print_request_error(e)
+            return None
+
+    async def iter_pages(self, url, params):
+        """Yield each page of results, in page order, as soon as it arrives.
+
+        Pages after the first are requested concurrently once the total is
+        known. Raises httpx.HTTPError (or CircuitOpenError) if any page fails.
+        """
+        page_size = self.page_size
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def fetch_page(page):
+            async with semaphore:
+                with METRICS.timer('cw_page_fetch'):
+                    response = await self._send(url, params=dict(params, page=page, pageSize=page_size))
+                    data = response.json()
+                _count_page(response, data)
+                return response, data
+
+        first_response, first_page = await fetch_page(1)
+        yield first_page
+        if len(first_page) < page_size:
+            return
+
+        total_pages = _last_page_from_links(first_response)
+        if total_pages is None:
+            result = await self.request(f"{url}/count", params=count_params(params))
+            if result and 'count' in result:
+                total_pages = max(1, math.ceil(result['count'] / page_size))
+
+        if total_pages is None:
+            # No total available - walk pages sequentially until a short one
+            page = 2
+            while True:
+                _, data = await fetch_page(page)
+                yield data
+                if len(data) < page_size:
+                    return
+                page += 1
+
+        tasks = [asyncio.ensure_future(fetch_page(page)) for page in range(2, total_pages + 1)]
+        try:
+            for task in tasks:
+                _, data = await task
+                yield data
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def fetch_all_pages(self, url, params):
+        """Async counterpart of fetch_all_pages()"""
+        try:
+            results = []
+            async for data in self.iter_pages(url, params):
+                results.extend(data)
+            return results
+        except (httpx.HTTPError, CircuitOpenError) as e:
+            _print_request_error(e)
+            return None
+
+    async def get_time_entries(self, start_date, end_date, company_id, profile='full'):
+        """Get time entries for date range and company"""
+        url = f"{self.base_url}time/entries"
+        params = build_time_entries_params(start_date, end_date, company_id, profile)
+        return await self._enrich_for_profile(await self.fetch_all_pages(url, params), profile)
+
+    async def get_active_company_ids(self, start_date, end_date):
+        """Async counterpart of get_active_company_ids()"""
+        url = f"{self.base_url}time/entries"
+        entries = await self.fetch_all_pages(url, build_active_companies_params(start_date, end_date))
+        if entries is None:
+            return None
+        return _company_ids(entries)
+
+    async def get_time_entries_cached(self, start_date, end_date, company_id, store, profile='full'):
+        """Async counterpart of get_time_entries_cached(); store I/O runs in a thread"""
+        synced_at = await asyncio.to_thread(store.last_sync, company_id, start_date, end_date, profile)
+        if synced_at is not None and not store.needs_refresh(start_date, end_date, synced_at):
+            METRICS.count('entry_store_requests_total', result='hit')
+            entries = await asyncio.to_thread(store.get_entries, company_id, start_date, end_date, profile)
+            return await self._enrich_for_profile(entries, profile)
+        METRICS.count('entry_store_requests_total', result='miss' if synced_at is None else 'refresh')
+
+        sync_started = utc_timestamp()
+        url = f"{self.base_url}time/entries"
+        params = build_time_entries_params(start_date, end_date, company_id, profile, updated_since=synced_at)
+        entries = await self.fetch_all_pages(url, params)
+        if entries is None:
+            entries = await asyncio.to_thread(_stale_entries, store, company_id, start_date, end_date, profile, synced_at)
+        else:
+            await asyncio.to_thread(store.save_entries, company_id, entries, start_date, end_date, sync_started, profile,
+                                    synced_at is None)
+            if synced_at is not None:
+                await self._reconcile_window(store, company_id, start_date, end_date, profile, sync_started)
+            entries = await asyncio.to_thread(store.get_entries, company_id, start_date, end_date, profile)
+        return await self._enrich_for_profile(entries, profile)
+
+    async def _reconcile_window(self, store, company_id, start_date, end_date, profile, sync_started):
+        """Async counterpart of _reconcile_window()"""
+        url = f"{self.base_url}time/entries"
+        params = build_time_entries_params(start_date, end_date, company_id, profile)
+        result = await self.request(f"{url}/count", params=count_params(params))
+        if not result or 'count' not in result:
+            return
+        stored = await asyncio.to_thread(store.count_entries, company_id, start_date, end_date, profile)
+        if result['count'] == stored:
+            return
+        METRICS.count('entry_store_requests_total', result='reconcile')
+        entries = await self.fetch_all_pages(url, params)
+        if entries is not None:
+            await asyncio.to_thread(store.save_entries, company_id, entries, start_date, end_date, sync_started,
+                                    profile, True)
+
+    async def _enrich_for_profile(self, entries, profile):
+        if entries is None or not QUERY_PROFILES[profile].get('enrich'):
+            return entries
+        return await self.enrich_entries(entries)
+
+    async def enrich_entries(self, entries, cache=LOOKUP_CACHE):
+        """Async counterpart of enrich_entries(); each kind's batches are fetched concurrently"""
+        with METRICS.timer('enrich'):
+            found, missing = cached_lookups(cache, collect_lookup_ids(entries))
+            fetched = await asyncio.gather(*(self._fetch_lookups(kind, ids, cache) for kind, ids in missing.items()))
+            for kind, records in zip(missing, fetched):
+                found[kind].update(records)
+            return apply_lookups(entries, found)
+
+    async def _fetch_lookups(self, kind, ids, cache):
+        """Async counterpart of _fetch_lookups()"""
+        endpoints, fields = LOOKUPS[kind]
+        records = {}
+        complete = True
+        remaining = ids
+        for endpoint in endpoints:
+            url = f"{self.base_url}{endpoint}"
+            batches = await asyncio.gather(*(
+                self.fetch_all_pages(url, build_lookup_params(batch, fields)) for batch in lookup_batches(remaining)
+            ))
+            for rows in batches:
+                if rows is None:
+                    complete = False
+                    continue
+                records.update((row['id'], lookup_record(kind, row)) for row in rows)
+            remaining = [lookup_id for lookup_id in remaining if lookup_id not in records]
+            if not remaining or not complete:
+                break
+        store_lookups(cache, kind, ids, records, complete)
+        return records
+
+    async def stream_time_entries_cached(self, start_date, end_date, company_id, store, profile='full'):
+        """Yield lists of time entries for a window as they become available.
+
+        A window that has never been synced is streamed page by page straight
+        from ConnectWise and saved once complete, so the first entries arrive
+        after one page round trip. Otherwise this yields the single list from
+        get_time_entries_cached(), which is a local read plus a small delta.
+        Raises httpx.HTTPError (or CircuitOpenError) if ConnectWise fails mid-stream.
+        """
+        synced_at = await asyncio.to_thread(store.last_sync, company_id, start_date, end_date, profile)
+        if synced_at is not None:
+            entries = await self.get_time_entries_cached(start_date, end_date, company_id, store, profile)
+            if entries is None:
+                raise httpx.HTTPError("Could not fetch time entries")
+            yield entries
+            return
+
+        sync_started = utc_timestamp()
+        url = f"{self.base_url}time/entries"
+        params = build_time_entries_params(start_date, end_date, company_id, profile)
+        entries = []
+        async for data in self.iter_pages(url, params):
+            entries.extend(data)
+            yield data
+        await asyncio.to_thread(store.save_entries, company_id, entries, start_date, end_date, sync_started, profile,
+                                True)
@@ -0,0 +1,87 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from connectwise_report.config.settings import RESPONSE_CACHE_MAXSIZE, RESPONSE_CACHE_TTL
+
+class TTLCache:
+    """Bounded in-memory cache with per-item expiry and LRU eviction.
+
+    get_or_load() also coalesces concurrent misses for the same key, so
+    callers asking for the same thing at once share a single upstream load.
+    """
+
+    def __init__(self, maxsize=RESPONSE_CACHE_MAXSIZE, ttl=RESPONSE_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key):
+        """Return the cached value, or None if missing or expired"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires_at, value = item
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything when no key is given"""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    async def get_or_load(self, key, loader):
+        """Return the cached value or await loader() once for all concurrent callers.
+
+        None results are not cached, so failed loads are retried next time.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, loader))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def _load(self, key, loader):
+        value = await loader()
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            size = len(self._data)
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'size': size,
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+        }
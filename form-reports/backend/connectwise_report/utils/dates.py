@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+def last_week_range(current_date=None):
+    """Return (Monday 00:00, Friday 23:59:59) of the week before current_date"""
+    current_date = current_date or datetime.now()
+    # Get last week's Monday
+    days_since_monday = current_date.weekday()
+    start_date = current_date - timedelta(days=days_since_monday + 7)  # Go back an additional week
+    return week_range(start_date)
+
+def week_range(monday):
+    """Return (Monday 00:00, Friday 23:59:59) for the week starting on monday"""
+    # Set time to start of day (midnight)
+    start_date = monday.replace(hour=0, minute=0, second=0, microsecond=0)
+    end_date = start_date + timedelta(days=4)  # Go to Friday of that week
+    end_date = end_date.replace(hour=23, minute=59, second=59)
+    return start_date, end_date
+
+PERIODS = ('month', 'quarter', 'year')
+
+def last_period_range(period, current_date=None):
+    """Return (first day 00:00, first day of the next period 00:00) of the month, quarter or year before current_date"""
+    current_date = (current_date or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == 'month':
+        end_date = current_date.replace(day=1)
+        start_date = add_months(end_date, -1)
+    elif period == 'quarter':
+        end_date = current_date.replace(month=(current_date.month - 1) // 3 * 3 + 1, day=1)
+        start_date = add_months(end_date, -3)
+    elif period == 'year':
+        end_date = current_date.replace(month=1, day=1)
+        start_date = end_date.replace(year=end_date.year - 1)
+    else:
+        raise ValueError(f"Unknown period: {period}")
+    return start_date, end_date
+
+def add_months(first_of_month, months):
+    """Move the first day of a month by a number of months"""
+    index = first_of_month.year * 12 + first_of_month.month - 1 + months
+    return first_of_month.replace(year=index // 12, month=index % 12 + 1)
+
+def date_windows(start_date, end_date, days):
+    """Split start_date..end_date into consecutive windows of at most days days.
+
+    Windows never cross a month boundary, so every window belongs to one
+    calendar month. Like the ConnectWise query, the end of each window is
+    exclusive.
+    """
+    windows = []
+    window_start = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    while window_start < end_date:
+        next_month = add_months(window_start.replace(day=1), 1)
+        window_end = min(window_start + timedelta(days=days), next_month, end_date)
+        windows.append((window_start, window_end))
+        window_start = window_end
+    return windows
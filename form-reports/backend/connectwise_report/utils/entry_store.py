@@ -0,0 +1,136 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from connectwise_report.config.settings import ENTRY_STORE_PATH, ENTRY_STORE_STABLE_DAYS
+
+# Bump whenever SCHEMA changes; stores written with another version are rebuilt
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER NOT NULL,
+    profile TEXT NOT NULL,
+    company_id INTEGER NOT NULL,
+    time_start TEXT NOT NULL,
+    last_updated TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (profile, id)
+);
+CREATE INDEX IF NOT EXISTS idx_entries_company_start ON entries (company_id, profile, time_start);
+CREATE TABLE IF NOT EXISTS synced_windows (
+    company_id INTEGER NOT NULL,
+    profile TEXT NOT NULL,
+    window_start TEXT NOT NULL,
+    window_end TEXT NOT NULL,
+    synced_at TEXT NOT NULL,
+    PRIMARY KEY (company_id, profile, window_start, window_end)
+);
+"""
+
+def window_bounds(start_date, end_date):
+    """Return the timeStart bounds used by the ConnectWise query for a date range"""
+    return (f"{start_date.strftime('%Y-%m-%d')}T00:00:00Z",
+            f"{end_date.strftime('%Y-%m-%d')}T00:00:00Z")
+
+def utc_timestamp(value=None):
+    """Format a datetime (default: now) the way ConnectWise writes timestamps"""
+    value = value or datetime.now(timezone.utc)
+    return value.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+class EntryStore:
+    """SQLite store of raw time entries per company, indexed by timeStart.
+
+    A window that has been fetched once is recorded in synced_windows along
+    with the time of the sync, so later reads can be served locally and
+    refreshed with only the entries updated since then. Entries are kept
+    per query profile since profiles project different fields.
+    """
+
+    def __init__(self, path=ENTRY_STORE_PATH, stable_days=ENTRY_STORE_STABLE_DAYS):
+        self.path = path
+        self.stable_days = stable_days
+        self._lock = threading.Lock()
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # Everything here can be fetched again, so an old layout is dropped rather than migrated
+            self._conn.executescript("DROP TABLE IF EXISTS entries; DROP TABLE IF EXISTS synced_windows;")
+        self._conn.executescript(SCHEMA)
+        self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        self._conn.close()
+
+    def get_entries(self, company_id, start_date, end_date, profile='full'):
+        """Read stored entries for a window, newest first like the API query"""
+        window_start, window_end = window_bounds(start_date, end_date)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM entries "
+                "WHERE company_id = ? AND profile = ? AND time_start >= ? AND time_start < ? "
+                "ORDER BY time_start DESC, id DESC",
+                (company_id, profile, window_start, window_end),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def last_sync(self, company_id, start_date, end_date, profile='full'):
+        """Return when a covering window was last synced, or None if it never was"""
+        window_start, window_end = window_bounds(start_date, end_date)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(synced_at) FROM synced_windows "
+                "WHERE company_id = ? AND profile = ? AND window_start <= ? AND window_end >= ?",
+                (company_id, profile, window_start, window_end),
+            ).fetchone()
+        return row[0] if row else None
+
+    def count_entries(self, company_id, start_date, end_date, profile='full'):
+        """Number of stored entries in a window"""
+        window_start, window_end = window_bounds(start_date, end_date)
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM entries "
+                "WHERE company_id = ? AND profile = ? AND time_start >= ? AND time_start < ?",
+                (company_id, profile, window_start, window_end),
+            ).fetchone()[0]
+
+    def needs_refresh(self, start_date, end_date, synced_at):
+        """Past windows synced after they closed are treated as final"""
+        _, window_end = window_bounds(start_date, end_date)
+        settled = utc_timestamp(datetime.now(timezone.utc) - timedelta(days=self.stable_days))
+        return window_end > settled or synced_at < window_end
+
+    def save_entries(self, company_id, entries, start_date, end_date, synced_at, profile='full', replace=False):
+        """Upsert fetched entries and record the window as synced at synced_at.
+
+        With replace (a full, non-incremental fetch), the window's stored
+        entries are dropped first, so entries deleted in ConnectWise or moved
+        out of the window do not linger.
+        """
+        window_start, window_end = window_bounds(start_date, end_date)
+        rows = [
+            (entry['id'], profile, company_id, entry.get('timeStart', ''),
+             entry.get('_info', {}).get('lastUpdated'), json.dumps(entry))
+            for entry in entries
+        ]
+        with self._lock, self._conn:
+            if replace:
+                self._conn.execute(
+                    "DELETE FROM entries "
+                    "WHERE company_id = ? AND profile = ? AND time_start >= ? AND time_start < ?",
+                    (company_id, profile, window_start, window_end),
+                )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (id, profile, company_id, time_start, last_updated, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO synced_windows (company_id, profile, window_start, window_end, synced_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (company_id, profile, window_start, window_end, synced_at),
+            )
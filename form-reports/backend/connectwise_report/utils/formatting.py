@@ -1,14 +1,38 @@
-from docx.shared import Pt
-from docx.oxml import parse_xml
+from functools import lru_cache
 import re
 
+# python-docx is imported inside the two cell helpers below so that loading
+# this module for normalization (and the HTML report) does not pull it in
+
 def set_cell_background(cell, color):
     """Helper function to set cell background color"""
+    from docx.oxml import parse_xml
     shading_elm = parse_xml(
         f'<w:shd xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" w:fill="{color}"/>'
     )
     cell._tc.get_or_add_tcPr().append(shading_elm)
 
+# Cap on distinct strings remembered by each memoized cleaner below
+CLEAN_CACHE_SIZE = 4096
+
+# SharePoint link after its leading 'http'
+SHAREPOINT_URL_REST = r's://it360nz\.sharepoint\.com/[^\s\)]+(?=[\s\)])'
+SHAREPOINT_URL = 'http' + SHAREPOINT_URL_REST
+# General URL characters except 'h' ('%' is inside the $-_ range)
+URL_CHARS_EXCEPT_H = r'[a-gi-zA-Z0-9$-_@.&+!*\\(),]'
+
+# One pass over the notes finds SharePoint links and other URLs together.
+# The shared 'http' prefix is factored out so the regex engine can jump
+# between candidates with a literal search. A general URL stops where a
+# SharePoint link begins (a check that only runs at an 'h'), so both are
+# replaced. The old separate SharePoint pass let such a URL run on into
+# the '[SharePoint ...]' placeholder and swallow part of it.
+NOTES_URL_PATTERN = re.compile(
+    rf'http(?:(?P<sharepoint>{SHAREPOINT_URL_REST})'
+    rf'|(?P<url>[s]?://(?:{URL_CHARS_EXCEPT_H}+|(?!{SHAREPOINT_URL})h)+))'
+)
+SHAREPOINT_FILE_PATTERN = re.compile(r'file=([^&]+)')
+
 def format_detail(notes, project):
     """Format the detail column with project name and bullet points"""
     if isinstance(project, dict):
@@ -21,50 +45,109 @@ def format_detail(notes, project):
         lines.append(f"Onsite Support - {project_name}")
     
     if notes:
-        # Process URLs in notes
-        processed_notes = process_urls(notes)
-        for line in processed_notes.split('\n'):
-            if line.strip():
-                if not line.startswith('#'):
-                    line = '# ' + line
-                lines.append(line)
+        formatted_notes = _format_detail_notes(notes)
+        if formatted_notes:
+            lines.append(formatted_notes)
     
     return '\n'.join(lines)
 
-def process_urls(text):
-    """Replace long URLs with more readable text"""
-    # SharePoint URL pattern
-    sharepoint_pattern = r'https://it360nz\.sharepoint\.com/[^\s\)]+(?=[\s\)])'
-    
-    def replace_sharepoint_url(match):
-        url = match.group(0)
+@lru_cache(maxsize=CLEAN_CACHE_SIZE)
+def _format_detail_notes(notes):
+    """Notes part of format_detail, memoized per distinct notes string"""
+    lines = []
+    # Process URLs in notes
+    processed_notes = process_urls(notes)
+    for line in processed_notes.split('\n'):
+        if line.strip():
+            if not line.startswith('#'):
+                line = '# ' + line
+            lines.append(line)
+    return '\n'.join(lines)
+
+def _replace_url(match):
+    url = match.group(0)
+    if match.lastgroup == 'sharepoint':
         # Extract filename if present
-        filename = re.search(r'file=([^&]+)', url)
+        filename = SHAREPOINT_FILE_PATTERN.search(url)
         if filename:
             # Clean up filename
             clean_name = filename.group(1).replace('%20', ' ').split('_')[-1].replace('.docx', '')
             return f"[SharePoint Doc: {clean_name}]"
         return "[SharePoint Link]"
-    
-    # Replace SharePoint URLs
-    text = re.sub(sharepoint_pattern, replace_sharepoint_url, text)
-    
-    # General long URL pattern (for other types of URLs)
-    url_pattern = r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
-    
-    def replace_long_url(match):
-        url = match.group(0)
-        if len(url) > 50:  # Only replace if URL is longer than 50 chars
-            return "[External Link]"
-        return url
-    
-    # Replace other long URLs
-    text = re.sub(url_pattern, replace_long_url, text)
-    
+    if len(url) > 50:  # Only replace if URL is longer than 50 chars
+        return "[External Link]"
+    return url
+
+@lru_cache(maxsize=CLEAN_CACHE_SIZE)
+def process_urls(text):
+    """Replace SharePoint links and long URLs with more readable text"""
+    if 'http' not in text:
+        return text
+    return NOTES_URL_PATTERN.sub(_replace_url, text)
+
+SUMMARY_REMOVE_PHRASES = [
+    "(DONT ADD TIME speak with Chris)",
+    "[DONT ADD TIME speak with Chris]",
+    "(DONT ADD TIME speak with chris)",
+    "[DONT ADD TIME speak with chris]",
+    "(DONT ADD TIME)",
+    "[DONT ADD TIME]",
+    "DONT ADD TIME",
+    "(speak with Chris)",
+    "[speak with Chris]",
+    "speak with Chris",
+    "(speak with chris)",
+    "[speak with chris]",
+    "speak with chris"
+]
+
+# Longest phrases first so a bracketed phrase wins over the bare one inside it
+SUMMARY_PHRASE_PATTERN = re.compile(
+    '|'.join(re.escape(phrase) for phrase in sorted(SUMMARY_REMOVE_PHRASES, key=len, reverse=True))
+)
+
+@lru_cache(maxsize=CLEAN_CACHE_SIZE)
+def clean_ticket_summary(summary):
+    """Clean up ticket summary by removing specific phrases"""
+    if not summary:
+        return 'N/A'
+
+    cleaned_summary = SUMMARY_PHRASE_PATTERN.sub('', summary).strip()
+
+    # Clean up any leftover empty brackets
+    cleaned_summary = cleaned_summary.replace('()', '').replace('[]', '').strip()
+
+    return cleaned_summary or 'N/A'  # Return 'N/A' if empty after cleaning
+
+def shorten_url(text):
+    """Helper to shorten SharePoint URLs in text"""
+    # Look for SharePoint URLs with specific patterns
+    if 'sharepoint.com' in text.lower():
+        # Extract the base part of the URL
+        if '?sourcedoc=' in text:
+            base_url = text.split('?sourcedoc=')[0]
+            return f"{base_url} [...]"
+        elif '&file=' in text:
+            base_url = text.split('&file=')[0]
+            return f"{base_url} [...]"
     return text
 
+@lru_cache(maxsize=CLEAN_CACHE_SIZE)
+def format_bullet_detail(notes):
+    """Format notes as '- ' bullet lines with SharePoint URLs shortened"""
+    formatted_lines = []
+    for line in (notes or '').split('\n'):
+        if line.strip():  # Only process non-empty lines
+            # Shorten URLs in the line
+            line = shorten_url(line.strip())
+            if not line.startswith('-'):
+                line = f"- {line}"
+            formatted_lines.append(line)
+    return '\n'.join(formatted_lines)
+
 def format_detail_cell(cell, text):
     """Format the detail cell with proper styling"""
+    from docx.shared import Pt
     cell.text = ''
     paragraph = cell.paragraphs[0]
     
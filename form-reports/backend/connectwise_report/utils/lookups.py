@@ -0,0 +1,109 @@
+from connectwise_report.config.settings import LOOKUP_CACHE_MAXSIZE, LOOKUP_CACHE_TTL, LOOKUP_BATCH_SIZE
+from connectwise_report.utils.cache import TTLCache
+from connectwise_report.utils.metrics import METRICS
+
+# Kind -> (endpoints tried in order, fields). Ticket IDs ConnectWise does
+# not return from /service/tickets are looked up again as project tickets.
+LOOKUPS = {
+    'ticket': (('service/tickets', 'project/tickets'), 'id,board/name,status/name'),
+    'project': (('project/projects',), 'id,name,board/name,status/name'),
+    'member': (('system/members',), 'id,identifier,firstName,lastName'),
+}
+
+# One cache per process, shared by the sync helpers and every
+# AsyncConnectWiseClient, so every request and report reuses the lookups
+LOOKUP_CACHE = TTLCache(maxsize=LOOKUP_CACHE_MAXSIZE, ttl=LOOKUP_CACHE_TTL)
+
+def _id(value):
+    return value.get('id') if isinstance(value, dict) else None
+
+def collect_lookup_ids(entries):
+    """The distinct ticket, project and member IDs whose details the entries leave out"""
+    ids = {kind: set() for kind in LOOKUPS}
+    for entry in entries:
+        ticket_id = _id(entry.get('ticket'))
+        missing_board = 'ticketBoard' not in entry or 'ticketStatus' not in entry
+        if ticket_id is not None and missing_board:
+            ids['ticket'].add(ticket_id)
+        project = entry.get('project')
+        project_id = _id(project)
+        # Entries charged to a project without a ticket take its board and status
+        if project_id is not None and ('name' not in project or (ticket_id is None and missing_board)):
+            ids['project'].add(project_id)
+        member = entry.get('member')
+        member_id = _id(member)
+        if member_id is not None and 'name' not in member:
+            ids['member'].add(member_id)
+    return ids
+
+def cached_lookups(cache, wanted):
+    """Split wanted IDs into ({kind: {id: record}} already cached, {kind: [id, ...]} to fetch)"""
+    found = {kind: {} for kind in LOOKUPS}
+    missing = {}
+    for kind, ids in wanted.items():
+        for lookup_id in ids:
+            record = cache.get((kind, lookup_id))
+            if record is None:
+                missing.setdefault(kind, []).append(lookup_id)
+            else:
+                found[kind][lookup_id] = record
+        if ids:
+            METRICS.count('lookup_cache_requests_total', len(ids) - len(missing.get(kind, ())), kind=kind, result='hit')
+            METRICS.count('lookup_cache_requests_total', len(missing.get(kind, ())), kind=kind, result='miss')
+    return found, missing
+
+def lookup_batches(ids):
+    """IDs in sorted batches of LOOKUP_BATCH_SIZE, one bulk query each"""
+    ids = sorted(ids)
+    return [ids[i:i + LOOKUP_BATCH_SIZE] for i in range(0, len(ids), LOOKUP_BATCH_SIZE)]
+
+def build_lookup_params(ids, fields):
+    """Query for a batch of records by ID, projected to the fields the reports use"""
+    return {
+        "conditions": f"id in ({','.join(str(lookup_id) for lookup_id in ids)})",
+        "fields": fields,
+    }
+
+def lookup_record(kind, raw):
+    """Reduce a ConnectWise ticket, project or member to the details the entries need"""
+    if kind == 'member':
+        name = f"{raw.get('firstName') or ''} {raw.get('lastName') or ''}".strip()
+        return {'name': name or raw.get('identifier')}
+    record = {'board': (raw.get('board') or {}).get('name'), 'status': (raw.get('status') or {}).get('name')}
+    if kind == 'project':
+        record['name'] = raw.get('name')
+    return record
+
+def store_lookups(cache, kind, ids, records, complete=True):
+    """Cache fetched records; when every query succeeded, IDs ConnectWise did not return are cached as {}"""
+    for lookup_id, record in records.items():
+        cache.set((kind, lookup_id), record)
+    if complete:
+        for lookup_id in ids:
+            if lookup_id not in records:
+                cache.set((kind, lookup_id), {})
+
+def apply_lookups(entries, found):
+    """Copy the looked-up details into the entries missing them; other entries are returned as they are"""
+    tickets, projects, members = found['ticket'], found['project'], found['member']
+    enriched = []
+    for entry in entries:
+        updates = {}
+        ticket = tickets.get(_id(entry.get('ticket')))
+        project = entry.get('project')
+        project_record = projects.get(_id(project))
+        # A ticket's board and status win over its project's
+        source = ticket if ticket else (project_record if _id(entry.get('ticket')) is None else None)
+        if source:
+            if 'ticketBoard' not in entry and source.get('board'):
+                updates['ticketBoard'] = source['board']
+            if 'ticketStatus' not in entry and source.get('status'):
+                updates['ticketStatus'] = source['status']
+        if project_record and 'name' not in project and project_record.get('name'):
+            updates['project'] = dict(project, name=project_record['name'])
+        member = entry.get('member')
+        member_record = members.get(_id(member))
+        if member_record and 'name' not in member and member_record.get('name'):
+            updates['member'] = dict(member, name=member_record['name'])
+        enriched.append(dict(entry, **updates) if updates else entry)
+    return enriched
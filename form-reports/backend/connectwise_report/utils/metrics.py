@@ -0,0 +1,141 @@
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from connectwise_report.config.settings import METRICS_ENABLED
+
+# Upper bounds (seconds) of the stage duration histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Stage timings collected for the current HTTP request's Server-Timing header
+request_timings = ContextVar('request_timings', default=None)
+
+class Metrics:
+    """Process-local counters and duration histograms.
+
+    Everything is keyed by metric name plus a sorted tuple of label pairs
+    and rendered in the Prometheus text format by render(). Worker processes
+    (report jobs, batch renders) keep their own registry.
+    """
+
+    def __init__(self, enabled=METRICS_ENABLED):
+        self.enabled = enabled
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def count(self, name, value=1, **labels):
+        """Add value to a counter"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        """Record one duration in a histogram"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(DURATION_BUCKETS), 0, 0.0]
+            buckets = histogram[0]
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if seconds <= bound:
+                    buckets[i] += 1
+            histogram[1] += 1
+            histogram[2] += seconds
+
+    def timer(self, stage, **labels):
+        """Context manager timing a pipeline stage into report_stage_seconds.
+
+        When metrics are disabled this returns a shared no-op context.
+        """
+        if not self.enabled:
+            return nullcontext()
+        return self._timer(stage, labels)
+
+    @contextmanager
+    def _timer(self, stage, labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.observe('report_stage_seconds', elapsed, stage=stage, **labels)
+            timings = request_timings.get()
+            if timings is not None:
+                timings.append((stage, elapsed))
+
+    def render(self, extra=()):
+        """Prometheus text exposition of every metric, plus (name, labels, value) gauges in extra"""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+
+        seen = set()
+
+        def header(name, kind):
+            if (name, kind) not in seen:
+                seen.add((name, kind))
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            header(name, 'counter')
+            lines.append(f"{name}{_labels(labels)} {value}")
+        for (name, labels), (buckets, count, total) in histograms:
+            header(name, 'histogram')
+            for bound, bucket_count in zip(DURATION_BUCKETS, buckets):
+                lines.append(f"{name}_bucket{_labels(labels + (('le', bound),))} {bucket_count}")
+            lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+            lines.append(f"{name}_sum{_labels(labels)} {total:.6f}")
+        for name, labels, value in extra:
+            header(name, 'gauge')
+            lines.append(f"{name}{_labels(tuple(sorted(labels.items())))} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def stage_totals(self):
+        """Total seconds and calls per stage, for printing a run summary"""
+        with self._lock:
+            totals = {}
+            for (name, labels), (_, count, total) in self._histograms.items():
+                if name == 'report_stage_seconds':
+                    stage = dict(labels)['stage']
+                    calls, seconds = totals.get(stage, (0, 0.0))
+                    totals[stage] = (calls + count, seconds + total)
+            return totals
+
+def _labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(f'{key}="{_escape_label(value)}"' for key, value in labels)
+    return '{' + pairs + '}'
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def server_timing_header(timings):
+    """Server-Timing header value, summing repeated stages (e.g. one per page)"""
+    totals = {}
+    for stage, elapsed in timings:
+        totals[stage] = totals.get(stage, 0.0) + elapsed
+    return ', '.join(f"{stage};dur={elapsed * 1000:.1f}" for stage, elapsed in totals.items())
+
+METRICS = Metrics()
+METRICS.describe('report_stage_seconds', "Time spent in each report pipeline stage")
+METRICS.describe('cw_response_bytes_total', "Bytes received from ConnectWise")
+METRICS.describe('report_entries_total', "Time entries handled, by source")
+METRICS.describe('http_request_seconds', "API request duration by route")
+METRICS.describe('fragment_cache_requests_total', "Report fragment lookups by kind and result (hit/miss)")
+METRICS.describe('scheduler_reports_total', "Scheduled pre-renders by format and result (rendered/cached/failed)")
+METRICS.describe('lookup_cache_requests_total', "Ticket, project and member lookups by kind and result (hit/miss)")
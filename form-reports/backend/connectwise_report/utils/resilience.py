@@ -0,0 +1,123 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from connectwise_report.config.settings import (
+    CW_RATE_LIMIT, CW_RATE_BURST, CW_BACKOFF_BASE, CW_BACKOFF_MAX, CW_BREAKER_FAILURES, CW_BREAKER_RESET
+)
+
+# Responses worth retrying: throttling and gateway/availability errors
+RETRYABLE_STATUS = {429, 502, 503, 504}
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling ConnectWise while the circuit breaker is open"""
+
+class TokenBucket:
+    """Client-side rate limiter shared by every thread and task in the process.
+
+    reserve() takes a token and returns how long the caller must wait before
+    using it, so sync callers time.sleep() and async callers asyncio.sleep()
+    on the same bucket.
+    """
+
+    def __init__(self, rate=CW_RATE_LIMIT, capacity=CW_RATE_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            # Negative tokens are requests queued behind the refill
+            return 0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def defer(self, seconds):
+        """Hold every caller back for at least seconds (e.g. after a 429 with Retry-After)"""
+        with self._lock:
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+class CircuitBreaker:
+    """Stops calling an upstream that keeps failing.
+
+    After failure_threshold consecutive failures the circuit opens and
+    check() raises CircuitOpenError straight away. Once reset_timeout has
+    passed a single trial request is let through; its success closes the
+    circuit and its failure opens it again. A trial that ends without
+    either (cancelled, or an unexpected error) must call end_trial(); a
+    trial still unresolved after reset_timeout is replaced by a new one.
+    """
+
+    def __init__(self, failure_threshold=CW_BREAKER_FAILURES, reset_timeout=CW_BREAKER_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._trial_started = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if self._trial else 'open'
+
+    def check(self):
+        """Raise CircuitOpenError while open; return a trial token if the caller is the trial request, else None"""
+        with self._lock:
+            if self.opened_at is None:
+                return None
+            now = time.monotonic()
+            trial_expired = self._trial and now - self._trial_started >= self.reset_timeout
+            if trial_expired or (not self._trial and now - self.opened_at >= self.reset_timeout):
+                self._trial = True
+                self._trial_started = now
+                return now
+            raise CircuitOpenError("ConnectWise circuit breaker is open after repeated failures")
+
+    def end_trial(self, trial):
+        """Count a trial that finished without recording success or failure as failed"""
+        with self._lock:
+            if self._trial and self._trial_started == trial:
+                self.opened_at = time.monotonic()
+                self._trial = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._trial = False
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt, retry_after=None, base=CW_BACKOFF_BASE, cap=CW_BACKOFF_MAX):
+    """Exponential backoff with full jitter, never shorter than the server's Retry-After"""
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    retry_after = parse_retry_after(retry_after)
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
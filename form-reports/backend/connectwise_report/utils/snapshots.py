@@ -0,0 +1,193 @@
+import gzip
+import json
+import os
+from datetime import datetime
+from connectwise_report.config.settings import SNAPSHOT_FORMAT
+from connectwise_report.models.time_entry import TimeEntry, normalize_entries
+
+# Format -> file extension. Arrow IPC files are left uncompressed so they
+# can be memory-mapped without copying; Parquet is zstd-compressed.
+SNAPSHOT_FORMATS = {'ndjson': '.ndjson.gz', 'arrow': '.arrow', 'parquet': '.parquet'}
+SNAPSHOT_KINDS = ('raw', 'normalized')
+SNAPSHOT_BATCH_ROWS = 10000  # Entries per Arrow record batch / Parquet row group, and per loaded batch
+PYARROW_INSTALL_HINT = "pip install pyarrow"
+# Raw Arrow/Parquet column listing each entry's explicit nulls (see _null_paths)
+NULLS_COLUMN = '__snapshot_nulls__'
+
+def snapshot_format(path):
+    """The snapshot format of a file, from its extension"""
+    for snapshot_fmt, extension in SNAPSHOT_FORMATS.items():
+        if path.endswith(extension):
+            return snapshot_fmt
+    raise ValueError(f"Not a snapshot file ({', '.join(SNAPSHOT_FORMATS.values())}): {path}")
+
+def snapshot_path(output_dir, kind, company_id, snapshot_fmt=SNAPSHOT_FORMAT):
+    """Where a report run writes its snapshot, named like the old debug_*_entries CSV dumps"""
+    name = 'raw' if kind == 'raw' else 'processed'
+    timestamp = datetime.now().strftime('%Y%m%d')
+    return os.path.join(output_dir, f"debug_{name}_entries_{company_id}_{timestamp}{SNAPSHOT_FORMATS[snapshot_fmt]}")
+
+def export_snapshot(entries, path, kind='raw', **metadata):
+    """Write raw API entries or normalized TimeEntry objects to path, in the format its extension names.
+
+    metadata (company_id, start_date, ...) is stored with the entries and
+    returned by load_snapshot.
+    """
+    if kind not in SNAPSHOT_KINDS:
+        raise ValueError(f"kind must be one of: {', '.join(SNAPSHOT_KINDS)}")
+    rows = [entry.to_fields() for entry in normalize_entries(entries)] if kind == 'normalized' else entries
+    metadata = dict(metadata, kind=kind, count=len(rows), created=datetime.now().isoformat(timespec='seconds'))
+
+    snapshot_fmt = snapshot_format(path)
+    # Write beside the target and move into place, so a snapshot is never half written
+    partial = f"{path}.{os.getpid()}.tmp"
+    if snapshot_fmt == 'ndjson':
+        _write_ndjson(rows, partial, metadata)
+    else:
+        _write_arrow(rows, partial, snapshot_fmt, kind, metadata)
+    os.replace(partial, path)
+    return path
+
+def load_snapshot(path):
+    """Return (entries, metadata) from a snapshot.
+
+    Raw snapshots give back API-shaped dicts and normalized ones TimeEntry
+    objects; either can be passed straight to HTMLReport and WordReport.
+    """
+    metadata, batches = iter_snapshot(path)
+    entries = []
+    for batch in batches:
+        entries.extend(batch)
+    return entries, metadata
+
+def iter_snapshot(path):
+    """Return (metadata, batches), where batches lazily yields lists of at most SNAPSHOT_BATCH_ROWS entries.
+
+    Only the batch being yielded is turned into Python objects: NDJSON is
+    read line by line, Arrow files are memory-mapped and Parquet is read a
+    row group at a time.
+    """
+    if snapshot_format(path) == 'ndjson':
+        metadata, row_batches = _read_ndjson(path)
+    else:
+        metadata, row_batches = _read_arrow(path)
+    return metadata, _entry_batches(row_batches, metadata['kind'])
+
+def _entry_batches(row_batches, kind):
+    for rows in row_batches:
+        yield [TimeEntry.from_fields(row) for row in rows] if kind == 'normalized' else rows
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def _write_ndjson(rows, path, metadata):
+    # One header line, then one entry per line with its nesting intact
+    with gzip.open(path, 'wt', encoding='utf-8', compresslevel=6) as f:
+        f.write(json.dumps({'snapshot': metadata}) + '\n')
+        for row in rows:
+            f.write(json.dumps(row, separators=(',', ':'), default=_json_default) + '\n')
+
+def _read_ndjson(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        metadata = json.loads(f.readline())['snapshot']
+    return metadata, _ndjson_batches(path)
+
+def _ndjson_batches(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        f.readline()
+        rows = []
+        for line in f:
+            if line.strip():
+                rows.append(json.loads(line))
+            if len(rows) == SNAPSHOT_BATCH_ROWS:
+                yield rows
+                rows = []
+        if rows:
+            yield rows
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError(f"Arrow and Parquet snapshots need pyarrow ({PYARROW_INSTALL_HINT}); "
+                          f"use the ndjson format without it")
+    return pyarrow
+
+def _normalized_schema(pa):
+    text = pa.string()
+    when = pa.timestamp('us', tz='Pacific/Auckland')
+    return pa.schema([
+        ('id', pa.int64()), ('time_start', text), ('start', when), ('end', when), ('hours', pa.float64()),
+        ('billable_option', text), ('ticket_id', text), ('ticket_summary', text), ('site_name', text),
+        ('board', text), ('status', text), ('engineer', text), ('work_type', text), ('project_name', text),
+        ('notes', text), ('html_notes', text), ('word_detail', text),
+    ])
+
+def _write_arrow(rows, path, snapshot_fmt, kind, metadata):
+    pa = _pyarrow()
+    if kind == 'normalized':
+        table = pa.Table.from_pylist(rows, schema=_normalized_schema(pa))
+    elif rows:
+        # Struct columns give every entry every key, so note the nulls that
+        # were really in the API response to tell them apart on load
+        rows = [dict(row, **{NULLS_COLUMN: _null_paths(row)}) for row in rows]
+        # Infer nested struct columns from every entry, not just the first
+        try:
+            table = pa.Table.from_batches([pa.RecordBatch.from_struct_array(pa.array(rows))])
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            raise ValueError(f"Raw entries do not fit one Arrow schema ({e}); use the ndjson format") from e
+    else:
+        table = pa.table({})
+    table = table.replace_schema_metadata({'snapshot': json.dumps(metadata)})
+
+    if snapshot_fmt == 'arrow':
+        with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=SNAPSHOT_BATCH_ROWS)
+    else:
+        import pyarrow.parquet as pq
+        pq.write_table(table, path, compression='zstd', row_group_size=SNAPSHOT_BATCH_ROWS)
+
+def _read_arrow(path):
+    pa = _pyarrow()
+    if snapshot_format(path) == 'arrow':
+        reader = pa.ipc.open_file(pa.memory_map(path))
+        schema = reader.schema
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    else:
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(path, memory_map=True)
+        schema = parquet_file.schema_arrow
+        batches = parquet_file.iter_batches(batch_size=SNAPSHOT_BATCH_ROWS)
+    metadata = json.loads(schema.metadata[b'snapshot'])
+    return metadata, _arrow_batches(batches, metadata['kind'])
+
+def _arrow_batches(batches, kind):
+    for batch in batches:
+        rows = batch.to_pylist()
+        yield [_restore_nulls(row) for row in rows] if kind == 'raw' else rows
+
+def _null_paths(value, path=()):
+    """JSON-encoded key paths of the explicit nulls in an entry"""
+    items = value.items() if isinstance(value, dict) else enumerate(value) if isinstance(value, list) else ()
+    paths = []
+    for key, item in items:
+        if item is None:
+            paths.append(json.dumps(path + (key,)))
+        else:
+            paths.extend(_null_paths(item, path + (key,)))
+    return paths
+
+def _restore_nulls(row):
+    """Drop the nulls Arrow filled in for missing keys, keeping those the API sent"""
+    nulls = {tuple(json.loads(null_path)) for null_path in row.pop(NULLS_COLUMN, None) or ()}
+    return _drop_nulls(row, nulls)
+
+def _drop_nulls(value, nulls, path=()):
+    if isinstance(value, dict):
+        return {key: _drop_nulls(item, nulls, path + (key,)) for key, item in value.items()
+                if item is not None or path + (key,) in nulls}
+    if isinstance(value, list):
+        return [_drop_nulls(item, nulls, path + (index,)) for index, item in enumerate(value)]
+    return value
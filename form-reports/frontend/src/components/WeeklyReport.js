@@ -4,22 +4,32 @@ import { Paper, Container, Typography } from '@mui/material';
 import TimeEntry from './TimeEntry';
 import DateSelector from './DateSelector';
 import NavigationControls from './NavigationControls';
-import { fetchTimeEntries } from '../services/api';
+import { streamTimeEntries, prefetchAdjacentWeeks } from '../services/api';
 
 const WeeklyReport = () => {
   const [entries, setEntries] = useState([]);
   const [currentDate, setCurrentDate] = useState(new Date());
+  const [error, setError] = useState(null);
 
   useEffect(() => {
     const startDate = startOfWeek(currentDate, { weekStartsOn: 1 }); // Monday
     const endDate = endOfWeek(currentDate, { weekStartsOn: 1 }); // Sunday
     
-    const loadEntries = async () => {
-      const data = await fetchTimeEntries(startDate, endDate);
-      setEntries(data);
-    };
+    // Render entries as they stream in; abort if the week changes mid-stream
+    const controller = new AbortController();
+    setEntries([]);
+    setError(null);
+    streamTimeEntries(startDate, endDate, batch => {
+      setEntries(current => current.concat(batch));
+    }, controller.signal).then(() => {
+      // Warm the previous and next weeks once this one has loaded
+      if (!controller.signal.aborted) prefetchAdjacentWeeks(startDate, endDate);
+    }).catch(err => {
+      // Don't show a partial week as if it were complete, or warm its neighbours
+      if (!controller.signal.aborted) setError(err);
+    });
 
-    loadEntries();
+    return () => controller.abort();
   }, [currentDate]);
 
   const handlePreviousWeek = () => {
@@ -50,6 +60,12 @@ const WeeklyReport = () => {
         onNext={handleNextWeek}
       />
 
+      {error && (
+        <Typography color="error" align="center" gutterBottom>
+          Could not load this week's time entries: {error.message}
+        </Typography>
+      )}
+
       {entries.map(entry => (
         <TimeEntry key={entry.id} entry={entry} />
       ))}
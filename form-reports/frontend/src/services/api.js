@@ -1,18 +1,143 @@
 import axios from 'axios';
+import { addDays } from 'date-fns';
 
 const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:5000';
 
-export const fetchTimeEntries = async (startDate, endDate) => {
+// Small client-side cache of loaded weeks so stepping back and forth is instant
+const WEEK_CACHE_SIZE = 8;
+const WEEK_CACHE_TTL_MS = 5 * 60 * 1000;
+const weekCache = new Map();
+
+const weekKey = (startDate, endDate) => `${startDate.toISOString()}/${endDate.toISOString()}`;
+
+const getCachedWeek = (key) => {
+  const cached = weekCache.get(key);
+  if (!cached) return undefined;
+  if (Date.now() - cached.loadedAt > WEEK_CACHE_TTL_MS) {
+    weekCache.delete(key);
+    return undefined;
+  }
+  // Re-insert to mark as most recently used
+  weekCache.delete(key);
+  weekCache.set(key, cached);
+  return cached.entries;
+};
+
+const cacheWeek = (key, entries) => {
+  weekCache.delete(key);
+  weekCache.set(key, { entries, loadedAt: Date.now() });
+  while (weekCache.size > WEEK_CACHE_SIZE) {
+    weekCache.delete(weekCache.keys().next().value);
+  }
+};
+
+const inflightWeeks = new Map();
+
+// Rejects if the week cannot be loaded, so callers never mistake a failure
+// for an empty week. Pass { prefetch: false } for requests that are
+// themselves prefetches, so the backend does not warm further weeks.
+export const fetchTimeEntries = async (startDate, endDate, { prefetch = true } = {}) => {
+  const key = weekKey(startDate, endDate);
+  const cached = getCachedWeek(key);
+  if (cached) return cached;
+  // Share one request between callers asking for the same week at once
+  if (inflightWeeks.has(key)) return inflightWeeks.get(key);
+
+  const request = (async () => {
+    try {
+      const response = await axios.get(`${API_BASE_URL}/time-entries`, {
+        params: {
+          startDate: startDate.toISOString(),
+          endDate: endDate.toISOString(),
+          ...(prefetch ? {} : { prefetch: 0 })
+        }
+      });
+      cacheWeek(key, response.data);
+      return response.data;
+    } finally {
+      inflightWeeks.delete(key);
+    }
+  })();
+  inflightWeeks.set(key, request);
+  return request;
+};
+
+// Load the weeks either side into the cache in the background. The backend
+// already warmed them when this week was requested, so these requests ask it
+// not to warm the weeks beyond.
+export const prefetchAdjacentWeeks = (startDate, endDate) => {
+  for (const days of [-7, 7]) {
+    const start = addDays(startDate, days);
+    if (start > new Date()) continue;
+    fetchTimeEntries(start, addDays(endDate, days), { prefetch: false }).catch(error => {
+      console.error('Error prefetching time entries:', error);
+    });
+  }
+};
+
+// Streams entries as NDJSON, calling onEntries with each batch as it arrives
+// so the first entries render after one ConnectWise page instead of the
+// whole week. Pass an AbortSignal to stop a stream that is no longer needed.
+export const streamTimeEntries = async (startDate, endDate, onEntries, signal) => {
+  const key = weekKey(startDate, endDate);
+  const cached = getCachedWeek(key);
+  if (cached) {
+    onEntries(cached);
+    return;
+  }
+  // A prefetch for this week is already on its way; wait for it instead,
+  // and stream the week ourselves if it fails
+  if (inflightWeeks.has(key)) {
+    try {
+      const entries = await inflightWeeks.get(key);
+      if (!signal || !signal.aborted) onEntries(entries);
+      return;
+    } catch (error) {
+      if (signal && signal.aborted) return;
+    }
+  }
+
+  const params = new URLSearchParams({
+    startDate: startDate.toISOString(),
+    endDate: endDate.toISOString(),
+    format: 'ndjson'
+  });
   try {
-    const response = await axios.get(`${API_BASE_URL}/time-entries`, {
-      params: {
-        startDate: startDate.toISOString(),
-        endDate: endDate.toISOString()
+    const response = await fetch(`${API_BASE_URL}/time-entries?${params}`, { signal });
+    if (!response.ok) {
+      throw new Error(`HTTP ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    const entries = [];
+    let buffered = '';
+    for (;;) {
+      const { done, value } = await reader.read();
+      buffered += decoder.decode(value || new Uint8Array(), { stream: !done });
+      const lines = buffered.split('\n');
+      buffered = done ? '' : lines.pop();
+
+      const batch = [];
+      for (const line of lines) {
+        if (!line.trim()) continue;
+        const item = JSON.parse(line);
+        if (item.error) throw new Error(item.error);
+        batch.push(item);
       }
-    });
-    return response.data;
+      if (batch.length) {
+        entries.push(...batch);
+        onEntries(batch);
+      }
+      if (done) {
+        cacheWeek(key, entries);
+        return;
+      }
+    }
   } catch (error) {
-    console.error('Error fetching time entries:', error);
-    return [];
+    // An aborted stream is not an error; anything else is the caller's to show
+    if (error.name === 'AbortError') return;
+    console.error('Error streaming time entries:', error);
+    throw error;
   }
-}; 
\ No newline at end of file
+};